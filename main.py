@@ -1,24 +1,132 @@
 version = "1.1.0"
 
+import atexit
+import concurrent.futures
+import cProfile
 import ctypes
+import functools
+import hashlib
+import hmac
 import json
 import logging
+import logging.handlers
+import math
 import os
+import pstats
+import queue
 import re
+import secrets
 import shlex
 import shutil
+import socket
+import stat
+import struct
 import subprocess
 import sys
+import tarfile
+import threading
+import time
 import uuid
+import zipfile
+import zlib
+
+def get_default_config_location():
+    match sys.platform:
+        case "win32":
+            return os.getenv('APPDATA') + "\\MultiJack\\"
+        case "darwin":
+            return os.getenv('HOME') + "/Library/Application Support/MultiJack/"
+        case "linux":
+            return os.getenv('HOME') + "/.config/multijack/"
+
+profiling_enabled = "-profile" in sys.argv
+profile_summary_lines = 40
+_profile_lock = threading.Lock()
+_startup_profiler = None
+
+def get_profile_location():
+    return os.path.join(get_default_config_location(), "profiles")
+
+def save_profile(profiler, name):
+    # The .pstats file is for snakeviz and friends, the .txt one can be read as is
+    try:
+        os.makedirs(get_profile_location(), exist_ok=True)
+        profile_path = os.path.join(get_profile_location(), f"{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{name}")
+        profiler.dump_stats(profile_path + ".pstats")
+        with open(profile_path + ".txt", 'w', encoding='utf-8') as summary_file:
+            stats = pstats.Stats(profiler, stream=summary_file)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(profile_summary_lines)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(profile_summary_lines)
+        # This can run before the logger is set up
+        logging.getLogger(__name__).info(f"Profile of {name} saved to {profile_path}.pstats")
+    except OSError as e:
+        logging.getLogger(__name__).error(f"Failed to save the profile of {name}: {e}")
+
+def profiled(name):
+    # Without -profile the function is left untouched, so this costs nothing
+    def decorator(function):
+        if not profiling_enabled:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            # cProfile sees every thread but only one can run at a time, so whatever starts while
+            # something else is being profiled ends up in that profile instead
+            if not _profile_lock.acquire(blocking=False):
+                return function(*args, **kwargs)
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(function, *args, **kwargs)
+            finally:
+                save_profile(profiler, name)
+                _profile_lock.release()
+        return wrapper
+    return decorator
+
+def finish_startup_profile():
+    global _startup_profiler
+    if _startup_profiler is not None:
+        _startup_profiler.disable()
+        save_profile(_startup_profiler, "startup")
+        _startup_profiler = None
+        _profile_lock.release()
+
+# Startup is profiled until the event loop runs, or until we exit for the command line flags that don't need one
+if profiling_enabled:
+    _profile_lock.acquire()
+    _startup_profiler = cProfile.Profile()
+    _startup_profiler.enable()
+    atexit.register(finish_startup_profile)
+
+def send_to_resident_launcher(argv):
+    # A running -resident instance already has Qt and the envs loaded, so all we have to do is pass the request on
+    try:
+        with open(os.path.join(get_default_config_location(), "resident.json"), 'r', encoding='utf-8') as resident_file:
+            resident = json.load(resident_file)
+        with socket.create_connection(("127.0.0.1", resident["port"]), timeout=0.5) as connection:
+            request = {"token": resident["token"], "argv": argv, "env": dict(os.environ), "pid": os.getpid()}
+            connection.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            connection.settimeout(2)
+            return connection.recv(16).strip() == b"ok"
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+# This runs before Qt is even imported, that's what makes the picker show up right away
+if "-launcher" in sys.argv and send_to_resident_launcher(sys.argv[1:]):
+    sys.exit(0)
+
 import psutil
 
-from PyQt6.QtCore import Qt, QEvent, QThread, pyqtSignal
-from PyQt6.QtGui import QKeyEvent
+from PyQt6.QtCore import Qt, QAbstractListModel, QEvent, QFileSystemWatcher, QModelIndex, QObject, QSocketNotifier, \
+    QSortFilterProxyModel, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QAction, QKeyEvent
+from PyQt6.QtNetwork import QHostAddress, QTcpServer
 from PyQt6.QtWidgets import QApplication, QLabel, QMainWindow, QListWidget, QWidget, QVBoxLayout, QPushButton, \
-    QMessageBox, QLineEdit, QFileDialog, QGridLayout, QDialog, QProgressDialog, QInputDialog, QHBoxLayout
+    QMessageBox, QLineEdit, QFileDialog, QGridLayout, QDialog, QProgressDialog, QInputDialog, QHBoxLayout, QListWidgetItem, QListView, \
+    QMenu, QStyle, QSystemTrayIcon, QComboBox, QPlainTextEdit
 # Controller support is only present on Linux right now
 if sys.platform == "linux":
-    from xbox360controller import Xbox360Controller
+    import evdev
 
 games = {
     "The Jackbox Party Pack": 331670,
@@ -46,6 +154,7 @@ games = {
 }
 
 _localization_cache = None
+_module_loaded_at = time.perf_counter()
 
 def load_localization():
     global _localization_cache
@@ -90,14 +199,17 @@ def get_default_steamapps_location():
         case "linux":
             return os.getenv('HOME') + "/.local/share/Steam/steamapps/common/"
 
-def get_default_config_location():
-    match sys.platform:
-        case "win32":
-            return os.getenv('APPDATA') + "\\MultiJack\\"
-        case "darwin":
-            return os.getenv('HOME') + "/Library/Application Support/MultiJack/"
-        case "linux":
-            return os.getenv('HOME') + "/.config/multijack/"
+def get_time_since_process_start():
+    try:
+        return max(0.0, time.time() - psutil.Process().create_time())
+    except psutil.Error:
+        return time.perf_counter() - _module_loaded_at
+
+def get_process_start_time(pid=None):
+    try:
+        return psutil.Process(pid).create_time()
+    except psutil.Error:
+        return time.time() - (time.perf_counter() - _module_loaded_at)
 
 def get_os_name():
     match sys.platform:
@@ -126,6 +238,83 @@ def get_default_executable():
         case "linux":
             return ""
 
+log_files = {
+    "gui": "multijack.log",
+    "launcher": "multijacklauncher.log",
+    "launch": "multijacklaunch.log",
+    "cli": "multijackcli.log",
+    "resident": "multijackresident.log"
+}
+
+_log_listener = None
+
+def setup_logging(log_type, level=None):
+    global _log_listener
+    if _log_listener is not None:
+        return
+    if not os.path.exists(get_default_config_location()):
+        os.makedirs(get_default_config_location())
+
+    if not isinstance(level, int):
+        level = logging.getLevelName(str(level or "INFO").upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+
+    # Rotate instead of deleting the log on every start, so we keep some history around
+    file_handler = logging.handlers.RotatingFileHandler(os.path.join(get_default_config_location(), log_files[log_type]), maxBytes=1024 * 1024, backupCount=3, encoding='utf-8', delay=True)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    file_handler.setLevel(level)
+
+    # Everything goes through a queue, the file writes happen on the listener's thread
+    log_queue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root_logger.removeHandler(handler)
+    _log_listener = None
+
+class FileOperationLog:
+    # Per-file messages are only written out at DEBUG level, warnings and errors are
+    # sampled, and everything is summed up when the operation is done.
+    def __init__(self, operation, sample_limit=10):
+        self.operation = operation
+        self.sample_limit = sample_limit
+        self.counts = {}
+
+    def record(self, outcome, level=logging.DEBUG, message=None, *args):
+        count = self.counts.get(outcome, 0) + 1
+        self.counts[outcome] = count
+        if message is None:
+            return
+        if level > logging.DEBUG and count > self.sample_limit:
+            if count == self.sample_limit + 1:
+                logger.log(level, f"{self.operation}: more \"{outcome}\" messages suppressed, see the summary")
+            level = logging.DEBUG
+        if logger.isEnabledFor(level):
+            logger.log(level, message, *args)
+
+    def summary(self, level=logging.INFO):
+        if self.counts:
+            details = ", ".join(f"{outcome}: {count}" for outcome, count in sorted(self.counts.items()))
+        else:
+            details = "nothing to do"
+        logger.log(level, f"{self.operation} finished ({details})")
+
 def set_config_option(option):
     if not os.path.exists(get_default_config_location()):
         os.makedirs(get_default_config_location())
@@ -152,115 +341,2563 @@ def set_config_option(option):
         sys.exit(1)
 
 
-def get_available_envs(game):
-    with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
-        config_data = json.load(config_file)
-    env_path = os.path.join(config_data.get("env_location"), game)
-
-    if not os.path.exists(env_path):
-        return [], {}
-    envs = []
-    env_ids = {}
-    for d in os.listdir(env_path):
-        env_dir = os.path.join(env_path, d)
-        if os.path.isdir(env_dir):
-            env_check = os.path.join(env_dir, "DO_NOT_REMOVE.json")
-            if os.path.isfile(env_check):
-                try:
-                    with open(env_check, 'r', encoding='utf-8') as env_info_file:
-                        env_info = json.load(env_info_file)
-                        env_name = env_info.get("name", d)
-                        envs.append(env_name)
-                        env_ids[env_name] = d
-                except json.JSONDecodeError:
-                    envs.append(d)
-                    env_ids[d] = d
-            else:
-                envs.append(d)
-                env_ids[d] = d
-    return envs, env_ids
+def has_envs(env_location, game):
+    env_path = os.path.join(env_location, game)
+    if not os.path.isdir(env_path):
+        return False
+    with os.scandir(env_path) as entries:
+        return any(entry.is_dir() and os.path.isfile(os.path.join(entry.path, "DO_NOT_REMOVE.json")) for entry in entries)
+
+def get_env_entries(env_location, game):
+    # Returns (env_id, name) for every env of a game, sorted by name
+    env_path = os.path.join(env_location, game)
+    if not os.path.isdir(env_path):
+        return []
+    env_entries = []
+    with os.scandir(env_path) as entries:
+        for entry in entries:
+            env_check = os.path.join(entry.path, "DO_NOT_REMOVE.json")
+            if not entry.is_dir() or not os.path.isfile(env_check):
+                continue
+            try:
+                with open(env_check, 'r', encoding='utf-8') as env_info_file:
+                    env_entries.append((entry.name, json.load(env_info_file).get("name", entry.name)))
+            except (OSError, json.JSONDecodeError):
+                env_entries.append((entry.name, entry.name))
+    return sorted(env_entries, key=lambda env_entry: env_entry[1].lower())
 
-def add_launch_options_to_env(env_config_location, launch_options):
+def update_env_config(env_config_location, options):
     if env_config_location is not None:
         if os.path.basename(os.path.dirname(env_config_location)) in games:
-            vanilla_env_config = {
-                "vanilla": True,
-                "launch_options": launch_options
-            }
+            vanilla_env_config = {"vanilla": True}
+            if os.path.exists(env_config_location):
+                try:
+                    with open(env_config_location, "r") as file:
+                        vanilla_env_config.update(json.load(file))
+                except json.JSONDecodeError:
+                    pass
+            vanilla_env_config.update(options)
             with open(env_config_location, "w") as file:
                 json.dump(vanilla_env_config, file, indent=4)
         elif os.path.exists(env_config_location):
             with open(env_config_location, "r") as file:
                 env_config = json.load(file)
-            env_config["launch_options"] = launch_options
+            env_config.update(options)
             with open(env_config_location, "w") as file:
                 json.dump(env_config, file, indent=4)
 
-class ControllerListener(QThread):
-    if sys.platform == "linux":
-        hat_signal = pyqtSignal(int)
-        button_signal = pyqtSignal()
-        exit_signal = pyqtSignal()
+def add_launch_options_to_env(env_config_location, launch_options):
+    update_env_config(env_config_location, {"launch_options": launch_options})
+
+ionice_classes = {"realtime": 1, "best-effort": 2, "idle": 3}
+
+def parse_cpu_list(cpu_list):
+    # Takes the same format as taskset -c, like "0-3,6"
+    cpus = set()
+    for part in cpu_list.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            if int(first) > int(last):
+                raise ValueError(f"Invalid CPU range: {part}")
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    if not cpus or any(cpu < 0 for cpu in cpus):
+        raise ValueError(f"Invalid CPU list: {cpu_list}")
+    return sorted(cpus)
+
+def get_available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return set(os.sched_getaffinity(0))
+    return set(range(os.cpu_count() or 1))
+
+def get_windows_priority_class(nice):
+    if nice <= -10:
+        return subprocess.HIGH_PRIORITY_CLASS
+    if nice < 0:
+        return subprocess.ABOVE_NORMAL_PRIORITY_CLASS
+    if nice >= 10:
+        return subprocess.IDLE_PRIORITY_CLASS
+    if nice > 0:
+        return subprocess.BELOW_NORMAL_PRIORITY_CLASS
+    return subprocess.NORMAL_PRIORITY_CLASS
+
+def get_launch_profile_command(profile):
+    # Whatever can be set before the game starts is, so everything it starts inherits it.
+    # Returns the command prefix, the creation flags, and what's left for apply_launch_profile
+    prefix = []
+    creationflags = 0
+    remaining = {}
+    nice = profile.get("nice")
+    ionice_class = profile.get("ionice_class")
+    cpu_affinity = profile.get("cpu_affinity")
+    if cpu_affinity:
+        # taskset refuses CPUs we don't have and the game would never start, so those are left out
+        available_cpus = get_available_cpus()
+        if not set(cpu_affinity) <= available_cpus:
+            logger.warning(f"CPUs {sorted(set(cpu_affinity) - available_cpus)} from the launch profile aren't available")
+            cpu_affinity = [cpu for cpu in cpu_affinity if cpu in available_cpus]
+
+    if sys.platform == "win32":
+        if nice is not None:
+            creationflags = get_windows_priority_class(nice)
+        if ionice_class:
+            remaining["ionice_class"] = ionice_class
+        if cpu_affinity:
+            remaining["cpu_affinity"] = cpu_affinity
+        return prefix, creationflags, remaining
+
+    if nice is not None:
+        if shutil.which("nice"):
+            prefix += ["nice", "-n", str(nice)]
+        else:
+            remaining["nice"] = nice
+    if ionice_class and sys.platform == "linux":
+        if shutil.which("ionice"):
+            prefix += ["ionice", "-t", "-c", str(ionice_classes[ionice_class])]
+            if ionice_class != "idle" and profile.get("ionice_level") is not None:
+                prefix += ["-n", str(profile.get("ionice_level"))]
+        else:
+            remaining["ionice_class"] = ionice_class
+            remaining["ionice_level"] = profile.get("ionice_level")
+    if cpu_affinity and sys.platform == "linux":
+        if shutil.which("taskset"):
+            prefix += ["taskset", "-c", ",".join(str(cpu) for cpu in cpu_affinity)]
+        else:
+            remaining["cpu_affinity"] = cpu_affinity
+    return prefix, creationflags, remaining
+
+def apply_launch_profile(pid, profile):
+    if not profile:
+        return
+    try:
+        root_process = psutil.Process(pid)
+        processes = [root_process] + root_process.children(recursive=True)
+    except psutil.Error as e:
+        logger.error(f"Failed to apply the launch profile: {e}")
+        return
+    for process in processes:
+        try:
+            if profile.get("nice") is not None:
+                process.nice(profile["nice"])
+            if profile.get("ionice_class"):
+                if sys.platform == "win32":
+                    process.ionice({"realtime": psutil.IOPRIO_HIGH, "best-effort": psutil.IOPRIO_NORMAL, "idle": psutil.IOPRIO_VERYLOW}[profile["ionice_class"]])
+                else:
+                    ioclass = {"realtime": psutil.IOPRIO_CLASS_RT, "best-effort": psutil.IOPRIO_CLASS_BE, "idle": psutil.IOPRIO_CLASS_IDLE}[profile["ionice_class"]]
+                    process.ionice(ioclass, profile.get("ionice_level") if ioclass != psutil.IOPRIO_CLASS_IDLE else None)
+            if profile.get("cpu_affinity"):
+                process.cpu_affinity(profile["cpu_affinity"])
+        except (psutil.Error, AttributeError, ValueError) as e:
+            logger.error(f"Failed to apply the launch profile to {process.pid}: {e}")
+
+steam_process_names = {
+    "win32": {"steam.exe"},
+    "darwin": {"steam_osx"},
+    "linux": {"steam", "steamwebhelper"}
+}
+
+_steam_pid = None
+_steam_scan_cache = (0.0, None)
+
+def get_steam_pid_from_pid_file():
+    # Returns the pid Steam left behind if that process is still Steam, None otherwise.
+    # The pid files stay around after Steam quits, so what's in them can be stale
+    match sys.platform:
+        case "win32":
+            import winreg
+            try:
+                with winreg.OpenKey(winreg.HKEY_CURRENT_USER, "Software\\Valve\\Steam\\ActiveProcess") as key:
+                    pid = int(winreg.QueryValueEx(key, "pid")[0])
+                    if is_steam_pid(pid):
+                        return pid
+            except OSError:
+                return None
+        case "linux":
+            for pid_file in [os.path.join(os.getenv('HOME', ''), ".steam", "steam.pid"),
+                             os.path.join(os.getenv('HOME', ''), ".var", "app", "com.valvesoftware.Steam", ".steam", "steam.pid")]:
+                try:
+                    with open(pid_file, 'r') as file:
+                        pid = int(file.read().strip() or 0)
+                except (OSError, ValueError):
+                    continue
+                if is_steam_pid(pid):
+                    return pid
+    return None
+
+def is_steam_pid(pid):
+    if not pid:
+        return False
+    try:
+        return psutil.Process(pid).name().lower() in steam_process_names.get(sys.platform, set())
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return False
+
+def scan_for_steam_pid(max_age=2.0):
+    global _steam_scan_cache
+    scanned_at, pid = _steam_scan_cache
+    if time.monotonic() - scanned_at < max_age:
+        return pid
+
+    pid = None
+    names = steam_process_names.get(sys.platform, set())
+    for process in psutil.process_iter(["name"]):
+        if (process.info["name"] or "").lower() in names:
+            pid = process.pid
+            break
+    _steam_scan_cache = (time.monotonic(), pid)
+    return pid
+
+def find_steam_pid():
+    global _steam_pid
+    if is_steam_pid(_steam_pid):
+        return _steam_pid
+
+    _steam_pid = get_steam_pid_from_pid_file()
+    if _steam_pid is None:
+        _steam_pid = scan_for_steam_pid()
+    return _steam_pid
+
+def is_steam_running():
+    return find_steam_pid() is not None
+
+class SteamExitWatcher(QThread):
+    steam_exited = pyqtSignal()
 
-        def __init__(self):
-            super().__init__()
-            self.controller = None
+    def __init__(self):
+        super().__init__()
+        self.stopped = False
 
-        def run(self):
+    def run(self):
+        while not self.stopped:
+            pid = find_steam_pid()
+            if pid is None:
+                self.steam_exited.emit()
+                return
             try:
-                with Xbox360Controller(0, axis_threshold=0.2) as self.controller:
-                    self.controller.button_a.when_pressed = self.select_env
-                    self.controller.button_b.when_pressed = self.exit_launcher
-                    self.controller.hat.when_moved = self.move_up_the_list
+                psutil.Process(pid).wait(timeout=0.5)
+            except psutil.TimeoutExpired:
+                continue
+            except psutil.NoSuchProcess:
+                pass
+            except psutil.AccessDenied:
+                time.sleep(0.5)
+
+    def stop(self):
+        self.stopped = True
+        self.wait()
+
+# Please don't look into these functions unless you actively hate yourself.
+def read_vdf(file_path):
+    data = {}
+    with open(file_path, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+    stack = [data]
+    last_key = None
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('//'):
+            continue
+
+        if line == '{':
+            new_dict = {}
+            if last_key is not None:
+                stack[-1][last_key] = new_dict
+            stack.append(new_dict)
+        elif line == '}':
+            stack.pop()
+        else:
+            match = re.match(r'^"([^"]+)"\s+"(.*)"$', line)
+            if match:
+                key, value = match.groups()
+                stack[-1][key] = value
+                last_key = key
+            else:
+                last_key = line.strip('"')
+
+    return data
 
-                    self.exec()
+def get_value(data, key):
+    keys = key.split('.')
+    for k in keys:
+        if isinstance(data, dict) and k in data:
+            data = data[k]
+        else:
+            return None
+    return data
+
+def set_value(data, key, value):
+    keys = key.split('.')
+    d = data
+    for k in keys[:-1]:
+        if k not in d or not isinstance(d[k], dict):
+            d[k] = {}
+        d = d[k]
+    d[keys[-1]] = value
+
+def save_vdf(data, file_path):
+    def write_dict(d, indent=0):
+        result = ""
+        for k, v in d.items():
+            if isinstance(v, dict):
+                result += '\t' * (indent // 4) + f'"{k}"\n' + '\t' * (indent // 4) + '{\n' + write_dict(v, indent + 4) + '\t' * (indent // 4) + '}\n'
+            else:
+                result += '\t' * (indent // 4) + f'"{k}"\t\t"{v}"\n'
+        return result
+
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write(write_dict(data))
+
+class BinaryVdfUInt64(int):
+    # Keeps 64-bit values 64-bit when the file is written back
+    pass
+
+binary_vdf_map = 0x00
+binary_vdf_string = 0x01
+binary_vdf_int32 = 0x02
+binary_vdf_float = 0x03
+binary_vdf_uint64 = 0x07
+binary_vdf_map_end = 0x08
+
+def read_binary_vdf_string(data, offset):
+    end = data.index(b"\x00", offset)
+    return data[offset:end].decode("utf-8", errors="surrogateescape"), end + 1
+
+def read_binary_vdf_map(data, offset):
+    result = {}
+    while True:
+        value_type = data[offset]
+        offset += 1
+        if value_type == binary_vdf_map_end:
+            return result, offset
+        key, offset = read_binary_vdf_string(data, offset)
+        if value_type == binary_vdf_map:
+            result[key], offset = read_binary_vdf_map(data, offset)
+        elif value_type == binary_vdf_string:
+            result[key], offset = read_binary_vdf_string(data, offset)
+        elif value_type == binary_vdf_int32:
+            result[key] = int.from_bytes(data[offset:offset + 4], "little", signed=True)
+            offset += 4
+        elif value_type == binary_vdf_float:
+            result[key] = struct.unpack("<f", data[offset:offset + 4])[0]
+            offset += 4
+        elif value_type == binary_vdf_uint64:
+            result[key] = BinaryVdfUInt64(int.from_bytes(data[offset:offset + 8], "little"))
+            offset += 8
+        else:
+            raise ValueError(f"Unknown binary VDF type {value_type:#x} at offset {offset - 1}")
+
+def read_binary_vdf(file_path):
+    with open(file_path, 'rb') as file:
+        data = file.read()
+    if not data:
+        return {}
+    result, _ = read_binary_vdf_map(data, 0)
+    return result
+
+def write_binary_vdf_map(data):
+    result = bytearray()
+    for key, value in data.items():
+        encoded_key = str(key).encode("utf-8", errors="surrogateescape") + b"\x00"
+        if isinstance(value, dict):
+            result += bytes([binary_vdf_map]) + encoded_key + write_binary_vdf_map(value)
+        elif isinstance(value, BinaryVdfUInt64):
+            result += bytes([binary_vdf_uint64]) + encoded_key + int(value).to_bytes(8, "little")
+        elif isinstance(value, bool) or isinstance(value, int):
+            result += bytes([binary_vdf_int32]) + encoded_key + int(value).to_bytes(4, "little", signed=True)
+        elif isinstance(value, float):
+            result += bytes([binary_vdf_float]) + encoded_key + struct.pack("<f", value)
+        else:
+            result += bytes([binary_vdf_string]) + encoded_key + str(value).encode("utf-8", errors="surrogateescape") + b"\x00"
+    return result + bytes([binary_vdf_map_end])
+
+def save_binary_vdf(data, file_path):
+    with open(file_path + ".tmp", 'wb') as file:
+        file.write(write_binary_vdf_map(data))
+    os.replace(file_path + ".tmp", file_path)
+
+def get_shortcut_appid(exe, app_name):
+    # The same ID Steam gives non-Steam shortcuts, so artwork and controller configs stick to them
+    appid = zlib.crc32((exe + app_name).encode("utf-8")) | 0x80000000
+    return appid - 0x100000000
+
+def get_env_shortcut(config_data, game, env_id):
+    env_config = read_env_config(config_data.get("env_location"), game, env_id)
+    executable = os.path.join(config_data.get("env_location"), game, env_id, get_default_game_executable(game))
+    exe = f'"{executable}"'
+    app_name = f"{game} ({env_config.get("name", env_id)})"
+    return {
+        "appid": get_shortcut_appid(exe, app_name),
+        "AppName": app_name,
+        "Exe": exe,
+        "StartDir": f'"{os.path.dirname(executable)}"',
+        "icon": "",
+        "ShortcutPath": "",
+        "LaunchOptions": env_config.get("launch_options") or "",
+        "IsHidden": 0,
+        "AllowDesktopConfig": 1,
+        "AllowOverlay": 1,
+        "OpenVR": 0,
+        "Devkit": 0,
+        "DevkitGameID": "",
+        "DevkitOverrideAppID": 0,
+        "LastPlayTime": 0,
+        "FlatpakAppID": "",
+        "tags": {"0": "MultiJack"}
+    }
+
+def get_shortcuts_vdf_locations(config_data):
+    userdata_path = os.path.join(config_data.get("steam_location") or "", "userdata")
+    if not os.path.isdir(userdata_path):
+        return []
+    return [os.path.join(userdata_path, user_folder, "config", "shortcuts.vdf") for user_folder in os.listdir(userdata_path)
+            if os.path.isdir(os.path.join(userdata_path, user_folder, "config"))]
+
+def has_env_shortcut(config_data, game, env_id):
+    exe = get_env_shortcut(config_data, game, env_id)["Exe"]
+    for shortcuts_location in get_shortcuts_vdf_locations(config_data):
+        try:
+            shortcuts = read_binary_vdf(shortcuts_location).get("shortcuts", {}) if os.path.exists(shortcuts_location) else {}
+        except (OSError, ValueError, IndexError):
+            continue
+        if any(isinstance(entry, dict) and entry.get("Exe") == exe for entry in shortcuts.values()):
+            return True
+    return False
+
+def update_env_shortcuts(config_data, game, env_id, remove=False):
+    # Steam rewrites shortcuts.vdf when it exits, so it has to be closed before calling this
+    shortcut = get_env_shortcut(config_data, game, env_id)
+    updated_files = 0
+    for shortcuts_location in get_shortcuts_vdf_locations(config_data):
+        try:
+            data = read_binary_vdf(shortcuts_location) if os.path.exists(shortcuts_location) else {}
+        except (OSError, ValueError, IndexError) as e:
+            logger.error(f"Failed to read {shortcuts_location}: {e}")
+            continue
+        # Anything else pointing at this env's executable is ours from before
+        shortcuts = [entry for entry in data.get("shortcuts", {}).values()
+                     if not (isinstance(entry, dict) and entry.get("Exe") == shortcut["Exe"])]
+        if not remove:
+            shortcuts.append(shortcut)
+        data["shortcuts"] = {str(index): entry for index, entry in enumerate(shortcuts)}
+        try:
+            save_binary_vdf(data, shortcuts_location)
+            updated_files += 1
+            logger.info(f"{"Removed" if remove else "Added"} shortcut {shortcut["AppName"]} in {shortcuts_location}")
+        except OSError as e:
+            logger.error(f"Failed to write {shortcuts_location}: {e}")
+    return updated_files
+
+def find_launch_option_updates(config_data):
+    steam_location = config_data.get("steam_location")
+    if not os.path.exists(steam_location):
+        return None
+
+    userdata_path = os.path.join(steam_location, "userdata")
+    if not os.path.exists(userdata_path):
+        return None
+    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+        executable = os.path.abspath(sys.executable)
+    else:
+        executable = f"python3 {os.path.abspath(__file__)}"
+        # ^^^ works only if python3 is added to path
+        # and if you have the dependencies
+        # either way, it's for debugging only
+
+    if os.name == "nt":
+        quoted_executable = f"\"{executable.replace("\\", "\\\\")}\"".replace("\"", "\\\"")
+    else:
+        quoted_executable = shlex.quote(executable)
+
+    launch_option = f"{quoted_executable} -launcher %command%"
+
+    modified_users = {}
+
+    for user_folder in os.listdir(userdata_path):
+        user_config_path = os.path.join(userdata_path, user_folder, "config", "localconfig.vdf")
+
+        if not os.path.exists(user_config_path):
+            continue
+
+        try:
+            data = read_vdf(user_config_path)
+            modified = False
+
+            for game, game_id in games.items():
+                launch_options_key = f"UserLocalConfigStore.Software.Valve.Steam.apps.{game_id}.LaunchOptions"
+                existing_value = get_value(data, launch_options_key)
+
+                if existing_value is None or existing_value != launch_option:
+                    set_value(data, launch_options_key, launch_option)
+                    modified = True
+
+            if modified:
+                modified_users[user_folder] = (user_config_path, data)
+
+        except Exception as e:
+            logger.error(f"Error reading VDF for user {user_folder}: {e}")
+
+    return modified_users
+
+_game_index = None
+
+def get_game_index_location():
+    return os.path.join(get_default_config_location(), "game_index.json")
+
+def get_file_mtime(file_path):
+    try:
+        return os.stat(file_path).st_mtime_ns
+    except OSError:
+        return None
+
+def get_steam_library_folders(steam_location, install_location=None):
+    libraries = []
+    if steam_location:
+        libraries.append(os.path.normpath(steam_location))
+        library_folders_vdf = os.path.join(steam_location, "steamapps", "libraryfolders.vdf")
+        if os.path.isfile(library_folders_vdf):
+            try:
+                data = read_vdf(library_folders_vdf)
+                folders = data.get("libraryfolders") or data.get("LibraryFolders") or {}
+                for key, entry in folders.items():
+                    # Older Steam versions only store the path, newer ones a whole block
+                    if isinstance(entry, dict):
+                        path = entry.get("path")
+                    elif key.isdigit():
+                        path = entry
+                    else:
+                        continue
+                    if path:
+                        libraries.append(os.path.normpath(path.replace("\\\\", "\\")))
+            except Exception as e:
+                logger.error(f"Error reading {library_folders_vdf}: {e}")
+    if install_location:
+        install_location = os.path.normpath(install_location)
+        if os.path.basename(install_location).lower() == "common" and os.path.basename(os.path.dirname(install_location)).lower() == "steamapps":
+            libraries.append(os.path.dirname(os.path.dirname(install_location)))
+
+    unique_libraries = []
+    for library in libraries:
+        if library not in unique_libraries:
+            unique_libraries.append(library)
+    return unique_libraries
+
+def read_app_manifest(manifest_path):
+    app_state = read_vdf(manifest_path).get("AppState", {})
+    return {
+        "appid": int(app_state.get("appid") or 0),
+        "installdir": app_state.get("installdir", ""),
+        "buildid": app_state.get("buildid", "")
+    }
+
+def scan_steam_library(library, cached_manifests):
+    manifests = {}
+    for game_id in games.values():
+        manifest_path = os.path.join(library, "steamapps", f"appmanifest_{game_id}.acf")
+        mtime = get_file_mtime(manifest_path)
+        if mtime is None:
+            continue
+        cached = cached_manifests.get(manifest_path)
+        if cached and cached.get("mtime") == mtime:
+            manifests[manifest_path] = cached
+            continue
+        try:
+            manifest = read_app_manifest(manifest_path)
+        except Exception as e:
+            logger.error(f"Error reading {manifest_path}: {e}")
+            continue
+        manifest["mtime"] = mtime
+        manifest["install_path"] = os.path.join(library, "steamapps", "common", manifest["installdir"])
+        manifests[manifest_path] = manifest
+    return manifests
+
+def save_game_index(index):
+    try:
+        if not os.path.exists(get_default_config_location()):
+            os.makedirs(get_default_config_location())
+        with open(get_game_index_location(), 'w', encoding='utf-8') as file:
+            json.dump(index, file, indent=4)
+    except OSError as e:
+        logger.error(f"Failed to save the game index: {e}")
+
+@profiled("load_game_index")
+def load_game_index(config_data, refresh=True):
+    global _game_index
+    index = {}
+    try:
+        with open(get_game_index_location(), 'r', encoding='utf-8') as file:
+            index = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        pass
+
+    if refresh or not index:
+        steam_location = config_data.get("steam_location", "")
+        install_location = config_data.get("install_location", "")
+        libraries = get_steam_library_folders(steam_location, install_location)
+        cached_manifests = index.get("manifests", {})
+
+        # Only the manifests of the games we know about get looked at, so this is a couple of stats per library
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(libraries))) as executor:
+            results = list(executor.map(lambda library: scan_steam_library(library, cached_manifests), libraries))
+
+        manifests = {}
+        for result in results:
+            manifests.update(result)
+
+        game_names = {game_id: game for game, game_id in games.items()}
+        installed = {}
+        for manifest in manifests.values():
+            game = game_names.get(manifest.get("appid"))
+            if game and game not in installed and os.path.isdir(manifest["install_path"]):
+                installed[game] = manifest["install_path"]
+
+        # Games copied into the install location by hand don't have a manifest
+        if install_location and os.path.isdir(install_location):
+            for game in games:
+                if game not in installed and os.path.isdir(os.path.join(install_location, game)):
+                    installed[game] = os.path.join(install_location, game)
+
+        # The envs keep linking into the old place until retarget_moved_installs has fixed them up
+        moved_games = dict(index.get("moved_games", {}))
+        for game, install_path in installed.items():
+            old_install_path = index.get("games", {}).get(game)
+            if old_install_path and os.path.normpath(old_install_path) != os.path.normpath(install_path) and not os.path.isdir(old_install_path):
+                moved_games.setdefault(game, old_install_path)
+            if os.path.normpath(moved_games.get(game, "")) == os.path.normpath(install_path):
+                del moved_games[game]
+
+        new_index = {
+            "steam_location": steam_location,
+            "install_location": install_location,
+            "libraries": libraries,
+            "manifests": manifests,
+            "games": installed
+        }
+        if moved_games:
+            new_index["moved_games"] = moved_games
+        if new_index != index:
+            save_game_index(new_index)
+        index = new_index
+
+    _game_index = index
+    return index
+
+def get_installed_games(config_data, refresh=True):
+    return dict(sorted(load_game_index(config_data, refresh).get("games", {}).items()))
+
+def get_game_install_path(config_data, game):
+    if _game_index is None:
+        load_game_index(config_data, refresh=False)
+    install_path = _game_index.get("games", {}).get(game)
+    if install_path:
+        return install_path
+    return os.path.join(config_data.get("install_location", ""), game)
+
+def get_game_buildid(config_data, game):
+    # A single stat of the game's manifest, it's only parsed again when Steam has changed it
+    if _game_index is None:
+        load_game_index(config_data, refresh=False)
+    install_path = get_game_install_path(config_data, game)
+    for manifest_path, manifest in _game_index.get("manifests", {}).items():
+        if manifest.get("appid") != games.get(game) or os.path.normpath(manifest.get("install_path", "")) != os.path.normpath(install_path):
+            continue
+        mtime = get_file_mtime(manifest_path)
+        if mtime is not None and mtime != manifest.get("mtime"):
+            try:
+                manifest.update(read_app_manifest(manifest_path))
+                manifest["mtime"] = mtime
             except Exception as e:
-                logger.error(f"Failed to initialize Xbox 360 controller: {e}")
+                logger.error(f"Error reading {manifest_path}: {e}")
+        return manifest.get("buildid") or None
+    return None
+
+def get_env_base_buildid(config_data, game, parent=None):
+    # A layered env is only as new as the env it's built on
+    if parent:
+        return read_env_config(config_data.get("env_location"), game, parent).get("buildid")
+    return get_game_buildid(config_data, game)
 
-    def select_env(self, button):
-        self.button_signal.emit()
+def is_env_stale(config_data, game, env_config):
+    current_buildid = get_game_buildid(config_data, game)
+    return bool(env_config.get("buildid") and current_buildid and env_config.get("buildid") != current_buildid)
 
-    def exit_launcher(self, button):
-        self.exit_signal.emit()
+class StatCache:
+    # Remembers what we already know about paths for the length of one operation, so asking
+    # about the same file twice (exists, islink, samefile...) doesn't cost another syscall
+    def __init__(self):
+        self.entries = {}
+        self.stats = {}
+        self.listings = {}
 
-    def move_up_the_list(self, hat):
-        if hat.y == 1:
-            self.hat_signal.emit(Qt.Key.Key_Up)
-        elif hat.y == -1:
-            self.hat_signal.emit(Qt.Key.Key_Down)
+    def add_entry(self, entry):
+        self.entries[entry.path] = entry
 
+    def lstat(self, path):
+        return self.stat(path, follow_symlinks=False)
+
+    def stat(self, path, follow_symlinks=True):
+        key = (path, follow_symlinks)
+        if key not in self.stats:
+            entry = self.entries.get(path)
+            try:
+                if entry is not None:
+                    self.stats[key] = entry.stat(follow_symlinks=follow_symlinks)
+                else:
+                    self.stats[key] = os.stat(path, follow_symlinks=follow_symlinks)
+            except OSError:
+                self.stats[key] = None
+        return self.stats[key]
+
+    def list_dir(self, dir_path):
+        if dir_path not in self.listings:
+            listing = {}
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        listing[entry.name] = entry
+                        self.entries[entry.path] = entry
+            except OSError:
+                pass
+            self.listings[dir_path] = listing
+        return self.listings[dir_path]
+
+    def get_entry(self, path):
+        entry = self.entries.get(path)
+        if entry is None:
+            entry = self.list_dir(os.path.dirname(path)).get(os.path.basename(path))
+        return entry
+
+    def lexists(self, path):
+        if path in self.entries:
+            return True
+        return self.lstat(path) is not None
+
+    def exists(self, path):
+        return self.stat(path) is not None
+
+    def islink(self, path):
+        entry = self.get_entry(path)
+        return entry is not None and entry.is_symlink()
+
+    def samefile(self, path1, path2):
+        stat1 = self.stat(path1)
+        stat2 = self.stat(path2)
+        return stat1 is not None and stat2 is not None and os.path.samestat(stat1, stat2)
+
+    def forget(self, path):
+        self.entries.pop(path, None)
+        self.stats.pop((path, True), None)
+        self.stats.pop((path, False), None)
+        self.listings.pop(path, None)
+        self.listings.get(os.path.dirname(path), {}).pop(os.path.basename(path), None)
+
+def walk_tree(top, stat_cache=None, follow_symlinks=False):
+    # Same idea as os.walk, but hands out the DirEntry objects so the callers can use the type
+    # information scandir already gave us instead of asking the filesystem again
+    pending = [top]
+    while pending:
+        dir_path = pending.pop()
+        dirs = []
+        files = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if stat_cache is not None:
+                        stat_cache.add_entry(entry)
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        dirs.append(entry)
+                    else:
+                        files.append(entry)
+        except OSError as e:
+            logger.debug("Failed to list %s: %s", dir_path, e)
+            continue
+        yield dir_path, dirs, files
+        pending.extend(reversed([entry.path for entry in dirs if follow_symlinks or not entry.is_symlink()]))
+
+_io_executor = None
+
+def get_io_executor():
+    # One pool for the I/O heavy work, so running things side by side doesn't hammer the disk with threads
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2), thread_name_prefix="MultiJack I/O")
+    return _io_executor
+
+def get_link_value(target, link_path):
+    # Links are relative where possible, so they keep working when the envs and the install move together.
+    # The kernel resolves them from where the link really is, hence the realpath.
+    try:
+        return os.path.relpath(os.path.abspath(target), os.path.realpath(os.path.dirname(link_path)))
+    except ValueError:
+        # Different drives on Windows
+        return os.path.abspath(target)
+
+def make_link(target, link_path, target_is_directory=False):
+    os.symlink(get_link_value(target, link_path), link_path, target_is_directory=target_is_directory)
+
+def resolve_link(link_path):
+    # Where a link points to, without following any links further along the way
+    return os.path.normpath(os.path.join(os.path.realpath(os.path.dirname(link_path)), os.readlink(link_path)))
+
+env_journal_name = "CREATING.json"
+orphaned_env_min_age = 10 * 60
+
+def create_env_directory(env_location, game, env_name, parent=None, backend="symlink"):
+    game_env_location = os.path.join(env_location, game)
+    if not os.path.exists(game_env_location):
+        os.makedirs(game_env_location)
+    env_id = str(uuid.uuid4())
+    while os.path.exists(os.path.join(game_env_location, env_id)):
+        env_id = str(uuid.uuid4())
+    specific_env_location = os.path.join(game_env_location, env_id)
+    os.makedirs(specific_env_location)
+    # The journal says what the env is going to be, so an interrupted build can be finished later
+    journal = {"name": env_name, "id": env_id, "game": game, "parent": parent, "backend": backend, "pid": os.getpid(), "started": time.time()}
+    with open(os.path.join(specific_env_location, env_journal_name), 'w', encoding='utf-8') as file:
+        json.dump(journal, file, indent=4)
+    return env_id, specific_env_location
+
+def write_env_config(specific_env_location, env_name, env_id, game, parent=None, backend="symlink", buildid=None):
+    data = {
+        "name": env_name,
+        "id": env_id,
+        "game": game,
+        "version": 0
+    }
+    if parent:
+        data["parent"] = parent
+    if buildid:
+        data["buildid"] = buildid
+    if backend != "symlink":
+        data["backend"] = backend
+    with open(os.path.join(specific_env_location, "DO_NOT_REMOVE.json"), 'w') as file:
+        json.dump(data, file, indent=4)
+    # With the config in place the env is complete
+    if os.path.exists(os.path.join(specific_env_location, env_journal_name)):
+        os.remove(os.path.join(specific_env_location, env_journal_name))
+    logger.info("Config file for env created successfully!")
+    return data
+
+def find_game_written_dirs(src_dir):
+    # The directories the game writes into: the ones holding its logs, and the ones it ships empty for
+    # its saves and caches. They stay real in an env, so what the game writes there doesn't land in
+    # whatever a directory link would point to
+    written_dirs = set()
+    for dir_path, dirs, files in walk_tree(src_dir):
+        if dir_path == src_dir:
+            continue
+        if (not dirs and not files) or any(entry.name.endswith("-log.txt") for entry in files):
+            rel_dir = os.path.relpath(dir_path, src_dir)
+            while rel_dir and rel_dir not in written_dirs:
+                written_dirs.add(rel_dir)
+                rel_dir = os.path.dirname(rel_dir)
+    return written_dirs
+
+@profiled("build_env_structure")
+def build_env_structure(src_dir, dest_dir, on_progress=None, is_canceled=None, game=None):
+    # Entries are linked as a whole, except in the directories the game writes into, which are mirrored.
+    # inject_mod_into_env splits the directories a mod writes into later
+    if game is None:
+        game = os.path.basename(os.path.normpath(src_dir))
+    operation_log = FileOperationLog(f"Creating env {dest_dir} from {src_dir}")
+    os.makedirs(dest_dir, exist_ok=True)
+    copy_paths = get_env_copy_paths(src_dir, game)
+    written_dirs = find_game_written_dirs(src_dir)
+    pending_dirs = [""]
+    total_entries = len(copy_paths)
+    processed_entries = 0
+
+    while pending_dirs:
+        rel_dir = pending_dirs.pop()
+        with os.scandir(os.path.join(src_dir, rel_dir)) as entries:
+            src_entries = [entry for entry in entries if not entry.name.endswith("-log.txt")
+                           and (rel_dir or entry.name not in ("DO_NOT_REMOVE.json", env_journal_name))
+                           and os.path.join(rel_dir, entry.name) not in copy_paths]
+        with os.scandir(os.path.join(dest_dir, rel_dir)) as entries:
+            existing_entries = {entry.name for entry in entries}
+        total_entries += len(src_entries)
+
+        for entry in src_entries:
+            rel_path = os.path.join(rel_dir, entry.name)
+            src_path = os.path.abspath(entry.path)
+            dest_path = os.path.join(dest_dir, rel_path)
+            try:
+                if rel_path in written_dirs:
+                    if entry.name not in existing_entries:
+                        os.mkdir(dest_path)
+                    pending_dirs.append(rel_path)
+                elif entry.name not in existing_entries:
+                    make_link(src_path, dest_path, entry.is_dir())
+                    operation_log.record("linked", logging.DEBUG, "Symlink created: %s -> %s", dest_path, src_path)
+                else:
+                    operation_log.record("already existed", logging.WARNING, "Symlink already exists: %s", dest_path)
+            except OSError as e:
+                operation_log.record("errors", logging.ERROR, "Error processing %s -> %s: %s", src_path, dest_path, e)
+
+            processed_entries += 1
+            if on_progress is not None:
+                on_progress(processed_entries, total_entries, rel_path)
+            if is_canceled is not None and is_canceled():
+                logger.info("Operation canceled by user.")
+                operation_log.summary()
+                return False
+
+    for copy_path in copy_paths:
+        dest_file = os.path.join(dest_dir, copy_path)
+        try:
+            ensure_real_directory(dest_dir, os.path.dirname(copy_path))
+            if os.path.islink(dest_file):
+                os.unlink(dest_file)
+            if not os.path.exists(dest_file):
+                # Copied under another name first, so a half-written file is never mistaken for a finished one
+                shutil.copy2(os.path.join(src_dir, copy_path), dest_file + ".partial")
+                os.replace(dest_file + ".partial", dest_file)
+                operation_log.record("copied", logging.DEBUG, "Copied file: %s", dest_file)
+            else:
+                operation_log.record("already existed", logging.WARNING, "File already exists: %s", dest_file)
+        except OSError as e:
+            operation_log.record("errors", logging.ERROR, "Error copying file %s: %s", dest_file, e)
+
+        processed_entries += 1
+        if on_progress is not None:
+            on_progress(processed_entries, total_entries, copy_path)
+
+    operation_log.summary()
+    return "errors" not in operation_log.counts
+
+def build_env(config_data, game, env_id, parent=None, backend="symlink", on_progress=None, is_canceled=None):
+    # Builds the env's files, or fills in whatever is missing when it was interrupted before
+    env_location = config_data.get("env_location")
+    specific_env_location = os.path.join(env_location, game, env_id)
+    if backend == "overlay":
+        return create_overlay_env_structure(specific_env_location)
+    if parent:
+        return build_layered_env_structure(os.path.join(env_location, game, parent), specific_env_location, game)
+    return build_env_structure(get_game_install_path(config_data, game), specific_env_location, on_progress, is_canceled)
+
+def is_env_id(name):
+    try:
+        return str(uuid.UUID(name)) == name
+    except ValueError:
+        return False
+
+def find_incomplete_envs(env_location):
+    # Returns the env folders without a config, with their journal if they have one. The env location can
+    # hold other things too, so only folders named like the envs create_env_directory makes count.
+    incomplete_envs = []
+    if not env_location or not os.path.isdir(env_location):
+        return incomplete_envs
+    with os.scandir(env_location) as game_entries:
+        for game_entry in game_entries:
+            if not game_entry.is_dir(follow_symlinks=False) or game_entry.name not in games:
+                continue
+            with os.scandir(game_entry.path) as env_entries:
+                for env_entry in env_entries:
+                    if not env_entry.is_dir(follow_symlinks=False) or not is_env_id(env_entry.name):
+                        continue
+                    if os.path.exists(os.path.join(env_entry.path, "DO_NOT_REMOVE.json")):
+                        continue
+                    journal = None
+                    try:
+                        with open(os.path.join(env_entry.path, env_journal_name), 'r', encoding='utf-8') as file:
+                            journal = json.load(file)
+                    except (OSError, json.JSONDecodeError):
+                        pass
+                    incomplete_envs.append((game_entry.name, env_entry.name, journal))
+    return incomplete_envs
+
+def is_env_being_created(env_dir, journal):
+    if journal and journal.get("pid") and journal.get("pid") != os.getpid() and psutil.pid_exists(journal["pid"]):
+        try:
+            if "multijack" in " ".join(psutil.Process(journal["pid"]).cmdline()).lower():
+                return True
+        except psutil.Error:
+            pass
+    # Anything touched recently might still be in the middle of being created
+    try:
+        return time.time() - os.stat(env_dir).st_mtime < orphaned_env_min_age
+    except OSError:
+        return True
+
+@profiled("sweep_incomplete_envs")
+def sweep_incomplete_envs(config_data):
+    # Finishes every env whose creation was interrupted, and returns the folders nothing is known about
+    env_location = config_data.get("env_location")
+    orphaned_envs = []
+    for game, env_id, journal in find_incomplete_envs(env_location):
+        env_dir = os.path.join(env_location, game, env_id)
+        if is_env_being_created(env_dir, journal) or os.path.ismount(os.path.join(env_dir, "merged")):
+            continue
+        if journal is not None and journal.get("synced_from"):
+            # Building it from the install would leave out whatever the sync didn't copy yet
+            logger.info(f"{env_dir} is waiting for a sync from {journal.get("synced_from")} to finish")
+            continue
+        if journal is None or journal.get("game") != game or journal.get("id") != env_id:
+            orphaned_envs.append(env_dir)
+            continue
+        logger.info(f"Resuming the creation of {journal.get("name")} ({env_dir})")
+        if build_env(config_data, game, env_id, journal.get("parent"), journal.get("backend", "symlink")):
+            write_env_config(env_dir, journal.get("name"), env_id, game, journal.get("parent"), journal.get("backend", "symlink"),
+                             get_env_base_buildid(config_data, game, journal.get("parent")))
+        else:
+            logger.error(f"Failed to resume the creation of {env_dir}")
+    return orphaned_envs
+
+def read_env_config(env_location, game, env_id):
+    try:
+        with open(os.path.join(env_location, game, env_id, "DO_NOT_REMOVE.json"), 'r', encoding='utf-8') as env_info_file:
+            return json.load(env_info_file)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def get_env_content_dir(env_location, game, env_id):
+    # Overlay envs keep their own files in the upper layer, everything else is the env itself
+    env_dir = os.path.join(env_location, game, env_id)
+    if read_env_config(env_location, game, env_id).get("backend") == "overlay":
+        return os.path.join(env_dir, "upper")
+    return env_dir
+
+def get_overlay_method():
+    if sys.platform != "linux":
+        return None
+    if shutil.which("fuse-overlayfs") and (shutil.which("fusermount3") or shutil.which("fusermount")):
+        return "fuse-overlayfs"
+    # Unprivileged overlay mounts inside a user namespace need Linux 5.11 or newer
+    try:
+        kernel_version = tuple(int(part) for part in re.match(r"(\d+)\.(\d+)", os.uname().release).groups())
+    except (AttributeError, ValueError):
+        return None
+    if kernel_version >= (5, 11) and shutil.which("unshare"):
+        return "unshare"
+    return None
+
+def create_overlay_env_structure(dest_dir):
+    for layer in ("upper", "work", "merged"):
+        os.makedirs(os.path.join(dest_dir, layer), exist_ok=True)
+    return True
+
+def get_overlay_lower_dirs(config_data, game, env_id):
+    lower_dirs = []
+    parent = read_env_config(config_data.get("env_location"), game, env_id).get("parent")
+    while parent:
+        parent_config = read_env_config(config_data.get("env_location"), game, parent)
+        parent_dir = os.path.join(config_data.get("env_location"), game, parent)
+        if parent_config.get("backend") != "overlay":
+            # A symlink env already has everything in it
+            lower_dirs.append(parent_dir)
+            return lower_dirs
+        lower_dirs.append(os.path.join(parent_dir, "upper"))
+        parent = parent_config.get("parent")
+    lower_dirs.append(get_game_install_path(config_data, game))
+    return lower_dirs
+
+def escape_overlay_path(path):
+    return path.replace("\\", "\\\\").replace(":", "\\:").replace(",", "\\,")
+
+def prepare_overlay_env(config_data, game, env_id):
+    # Returns the command prefix the game has to be started with, and whether we have to unmount it afterwards
+    env_dir = os.path.join(config_data.get("env_location"), game, env_id)
+    merged_dir = os.path.join(env_dir, "merged")
+    create_overlay_env_structure(env_dir)
+    if os.path.ismount(merged_dir):
+        return [], False
+
+    options = ",".join([
+        "lowerdir=" + ":".join(escape_overlay_path(lower_dir) for lower_dir in get_overlay_lower_dirs(config_data, game, env_id)),
+        "upperdir=" + escape_overlay_path(os.path.join(env_dir, "upper")),
+        "workdir=" + escape_overlay_path(os.path.join(env_dir, "work"))
+    ])
+    method = get_overlay_method()
+    if method == "fuse-overlayfs":
+        subprocess.run(["fuse-overlayfs", "-o", options, merged_dir], check=True, capture_output=True)
+        logger.info(f"Mounted overlay env at {merged_dir}")
+        return [], True
+    if method == "unshare":
+        # The mount only exists inside the game's own namespace and goes away together with it
+        return ["unshare", "--user", "--map-root-user", "--mount", "sh", "-c",
+                'mount -t overlay overlay -o "$1" "$2" && cd "$3" && shift 3 && exec "$@"',
+                "multijack-overlay", options + ",userxattr", merged_dir], False
+    raise RuntimeError("Neither fuse-overlayfs nor unprivileged overlayfs are available")
+
+def unmount_overlay_env(merged_dir):
+    fusermount = shutil.which("fusermount3") or shutil.which("fusermount")
+    if not fusermount or not os.path.ismount(merged_dir):
+        return
+    result = subprocess.run([fusermount, "-u", merged_dir], capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.error(f"Failed to unmount {merged_dir}: {result.stderr.strip()}")
+    else:
+        logger.info(f"Unmounted overlay env at {merged_dir}")
+
+class OverlayUnmounter(threading.Thread):
+    # Keeps an eye on the game and everything it started, and unmounts the env once all of it is gone
+    def __init__(self, process, merged_dir):
+        super().__init__(name="MultiJack overlay unmount")
+        self.process = process
+        self.merged_dir = merged_dir
+
+    def run(self):
+        seen_processes = {}
+        try:
+            seen_processes[self.process.pid] = psutil.Process(self.process.pid)
+        except psutil.Error:
+            pass
+        while seen_processes:
+            for process in list(seen_processes.values()):
+                try:
+                    for child in process.children(recursive=True):
+                        seen_processes.setdefault(child.pid, child)
+                except psutil.Error:
+                    pass
+            self.process.poll()
+            seen_processes = {pid: process for pid, process in seen_processes.items() if process.is_running() and process.status() != psutil.STATUS_ZOMBIE}
+            time.sleep(2)
+        unmount_overlay_env(self.merged_dir)
+
+def get_env_copy_paths(src_dir, game):
+    # Executables find their files relative to where they really are, so these can't be symlinks
+    copy_paths = []
+    if sys.platform == "darwin":
+        macos_executable = os.path.join(f"{game}.app", "Contents", "MacOS", game)
+        if os.path.lexists(os.path.join(src_dir, macos_executable)):
+            copy_paths.append(macos_executable)
+    elif sys.platform == "linux" and os.path.isdir(src_dir):
+        for entry in os.scandir(src_dir):
+            if entry.name.endswith("_Vulkan") or entry.name.endswith("_OpenGL"):
+                copy_paths.append(entry.name)
+    return copy_paths
+
+def ensure_real_directory(env_root, rel_dir):
+    # Turns every linked directory along rel_dir into a real one that links to each entry
+    # of the directory it pointed to, so writing into it doesn't touch what's behind the link
+    current = env_root
+    for part in os.path.normpath(rel_dir).split(os.sep):
+        if part in ("", "."):
+            continue
+        current = os.path.join(current, part)
+        if os.path.islink(current):
+            target = resolve_link(current)
+            if not os.path.isdir(target):
+                raise NotADirectoryError(f"{current} is a link to a file")
+            os.unlink(current)
+            os.mkdir(current)
+            for entry in os.scandir(target):
+                if entry.name.endswith("-log.txt"):
+                    continue
+                make_link(os.path.join(target, entry.name), os.path.join(current, entry.name), entry.is_dir())
+        elif not os.path.exists(current):
+            os.mkdir(current)
+    return current
+
+def build_layered_env_structure(parent_dir, dest_dir, game):
+    # A vanilla env is just a layered env on top of the install itself
+    return build_env_structure(parent_dir, dest_dir, game=game)
+
+def get_child_envs(env_location, game, env_id):
+    children = []
+    game_env_location = os.path.join(env_location, game)
+    if not env_id or not os.path.isdir(game_env_location):
+        return children
+    for entry in os.scandir(game_env_location):
+        env_check = os.path.join(entry.path, "DO_NOT_REMOVE.json")
+        if entry.is_dir() and os.path.isfile(env_check):
+            try:
+                with open(env_check, 'r', encoding='utf-8') as env_info_file:
+                    if json.load(env_info_file).get("parent") == env_id:
+                        children.append(entry.name)
+            except json.JSONDecodeError:
+                continue
+    return children
+
+@profiled("propagate_env_to_children")
+def propagate_env_to_children(env_location, game, env_id):
+    # Linked directories see the parent's changes on their own, only directories that were
+    # split for a mod need the new files linked in
+    parent_dir = os.path.join(env_location, game, env_id)
+    for child_id in get_child_envs(env_location, game, env_id):
+        child_dir = os.path.join(env_location, game, child_id)
+        if read_env_config(env_location, game, child_id).get("backend") == "overlay":
+            # The parent is one of its lower layers, there's nothing to link
+            continue
+        added_links = 0
+        for root, dirs, files in walk_tree(child_dir):
+            rel_path = os.path.relpath(root, child_dir)
+            parent_root = os.path.normpath(os.path.join(parent_dir, rel_path))
+            if not os.path.isdir(parent_root):
+                continue
+            existing = {entry.name for entry in dirs + files}
+            for entry in os.scandir(parent_root):
+                if entry.name in existing or entry.name == "DO_NOT_REMOVE.json" or entry.name.endswith("-log.txt"):
+                    continue
+                try:
+                    make_link(entry.path, os.path.join(root, entry.name), entry.is_dir())
+                    added_links += 1
+                except OSError as e:
+                    logger.error(f"Failed to link {entry.path} into {root}: {e}")
+        if added_links:
+            logger.info(f"Linked {added_links} new files from {env_id} into {child_id}")
+        propagate_env_to_children(env_location, game, child_id)
+
+@profiled("retarget_env_links")
+def retarget_env_links(env_location, old_location, new_location, env_games=None, on_progress=None):
+    # Points every env link that leads somewhere under old_location at the same place under new_location,
+    # without recreating anything. The envs are done side by side. Returns how many links were changed.
+    old_location = os.path.normpath(os.path.abspath(old_location))
+    new_location = os.path.normpath(os.path.abspath(new_location))
+    env_dirs = []
+    for game in env_games or games:
+        env_dirs += [get_env_content_dir(env_location, game, env_id) for env_id, _ in get_env_entries(env_location, game)]
+
+    def retarget_env(env_dir):
+        operation_log = FileOperationLog(f"Retargeting {env_dir} from {old_location} to {new_location}")
+        for _, dirs, files in walk_tree(env_dir):
+            for entry in dirs + files:
+                if not entry.is_symlink():
+                    continue
+                try:
+                    target = resolve_link(entry.path)
+                    if target != old_location and not target.startswith(old_location + os.sep):
+                        continue
+                    new_target = new_location + target[len(old_location):]
+                    os.unlink(entry.path)
+                    make_link(new_target, entry.path, os.path.isdir(new_target))
+                    operation_log.record("retargeted", logging.DEBUG, "Symlink retargeted: %s -> %s", entry.path, new_target)
+                except OSError as e:
+                    operation_log.record("errors", logging.ERROR, "Failed to retarget %s: %s", entry.path, e)
+        if operation_log.counts:
+            operation_log.summary()
+        return operation_log.counts.get("retargeted", 0)
+
+    retargeted_links = 0
+    futures = [get_io_executor().submit(retarget_env, env_dir) for env_dir in env_dirs]
+    for processed_envs, future in enumerate(concurrent.futures.as_completed(futures), 1):
+        retargeted_links += future.result()
+        if on_progress is not None:
+            on_progress(processed_envs, len(env_dirs))
+    logger.info(f"Retargeted {retargeted_links} links in {len(env_dirs)} envs from {old_location} to {new_location}")
+    return retargeted_links
+
+def retarget_moved_installs(config_data):
+    # Steam can move a game to another library on its own, load_game_index notices that and this catches the envs up
+    index = load_game_index(config_data, refresh=False)
+    retargeted_links = 0
+    for game, old_install_path in index.get("moved_games", {}).items():
+        if game not in index.get("games", {}):
+            continue
+        retargeted_links += retarget_env_links(config_data.get("env_location"), old_install_path, get_game_install_path(config_data, game), [game])
+    if index.pop("moved_games", None) is not None:
+        save_game_index(index)
+    return retargeted_links
+
+_env_usage_lock = threading.Lock()
+
+def get_env_usage_cache_location():
+    return os.path.join(get_default_config_location(), "env_usage.json")
+
+def load_env_usage_cache():
+    try:
+        with open(get_env_usage_cache_location(), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_env_usage_cache(cache):
+    try:
+        with open(get_env_usage_cache_location(), 'w', encoding='utf-8') as file:
+            json.dump(cache, file)
+    except OSError as e:
+        logger.error(f"Failed to save the env usage cache: {e}")
+
+def get_allocated_size(stat_result):
+    if hasattr(stat_result, "st_blocks"):
+        return stat_result.st_blocks * 512
+    return stat_result.st_size
+
+def format_size(size):
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def measure_env_usage(env_dir, cached_dirs):
+    # Symlinks don't take up real space, so only real files count. Directories that weren't
+    # touched since the last time (same mtime) reuse their old numbers without being listed again.
+    total = 0
+    measured_dirs = {}
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        dir_path = os.path.join(env_dir, rel_dir)
+        try:
+            dir_mtime = os.lstat(dir_path).st_mtime_ns
+        except OSError:
+            continue
+        cached = cached_dirs.get(rel_dir)
+        if cached and cached[0] == dir_mtime:
+            measured_dirs[rel_dir] = cached
+            total += cached[1]
+            pending.extend(cached[2])
+            continue
+
+        dir_bytes = 0
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.is_symlink():
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(os.path.join(rel_dir, entry.name))
+                    elif entry.is_file(follow_symlinks=False):
+                        dir_bytes += get_allocated_size(entry.stat(follow_symlinks=False))
+        except OSError as e:
+            logger.error(f"Failed to measure {dir_path}: {e}")
+            continue
+        measured_dirs[rel_dir] = [dir_mtime, dir_bytes, subdirs]
+        total += dir_bytes
+        pending.extend(subdirs)
+    return total, measured_dirs
+
+@profiled("get_env_usage")
+def get_env_usage(env_dirs):
+    with _env_usage_lock:
+        cache = load_env_usage_cache()
+    usage = {}
+    for env_dir in env_dirs:
+        total, measured_dirs = measure_env_usage(env_dir, cache.get(env_dir, {}).get("dirs", {}))
+        cache[env_dir] = {"total": total, "dirs": measured_dirs}
+        usage[env_dir] = total
+    with _env_usage_lock:
+        saved_cache = load_env_usage_cache()
+        saved_cache.update({env_dir: cache[env_dir] for env_dir in env_dirs})
+        save_env_usage_cache(saved_cache)
+    return usage
+
+def invalidate_env_usage(env_dir):
+    with _env_usage_lock:
+        cache = load_env_usage_cache()
+        if cache.pop(env_dir, None) is not None:
+            save_env_usage_cache(cache)
+
+def get_all_env_usage(env_location):
+    env_dirs = {}
+    if os.path.isdir(env_location):
+        for game_entry in os.scandir(env_location):
+            if not game_entry.is_dir() or game_entry.name not in games:
+                continue
+            for env_entry in os.scandir(game_entry.path):
+                env_check = os.path.join(env_entry.path, "DO_NOT_REMOVE.json")
+                if env_entry.is_dir(follow_symlinks=False) and os.path.isfile(env_check):
+                    try:
+                        with open(env_check, 'r', encoding='utf-8') as env_info_file:
+                            env_name = json.load(env_info_file).get("name", env_entry.name)
+                    except json.JSONDecodeError:
+                        env_name = env_entry.name
+                    env_dirs[get_env_content_dir(env_location, game_entry.name, env_entry.name)] = (game_entry.name, env_name)
+    usage = get_env_usage(list(env_dirs))
+    return sorted(((size, *env_dirs[env_dir]) for env_dir, size in usage.items()), reverse=True)
+
+hibernation_archive_name = "HIBERNATED.tar"
+max_restore_bytes_in_flight = 256 * 1024 * 1024
+
+def get_hibernation_compression():
+    # zstd is only in the standard library from Python 3.14 on, xz is slower but always there
+    return "zst" if "zst" in tarfile.TarFile.OPEN_METH else "xz"
+
+def is_env_hibernated(env_config):
+    return bool(env_config.get("hibernated"))
+
+def get_hibernation_archive(env_location, game, env_id, env_config=None):
+    if env_config is None:
+        env_config = read_env_config(env_location, game, env_id)
+    compression = (env_config.get("hibernated") or {}).get("compression", get_hibernation_compression())
+    return os.path.join(env_location, game, env_id, f"{hibernation_archive_name}.{compression}")
+
+def list_env_real_files(content_dir):
+    # Links cost nothing to keep around, so only real files go into the archive
+    real_files = []
+    for root, _, files in walk_tree(content_dir):
+        for entry in files:
+            if entry.is_symlink() or not entry.is_file(follow_symlinks=False):
+                continue
+            if root == content_dir and (entry.name in ("DO_NOT_REMOVE.json", env_journal_name) or entry.name.startswith(hibernation_archive_name)):
+                continue
+            real_files.append(os.path.relpath(entry.path, content_dir))
+    return real_files
+
+@profiled("hibernate_env")
+def hibernate_env(config_data, game, env_id, on_progress=None):
+    # Packs the env's real files into an archive next to its config and removes them. The links and
+    # directories stay where they are, so the env keeps its shape. Returns how many bytes were packed.
+    env_location = config_data.get("env_location")
+    env_dir = os.path.join(env_location, game, env_id)
+    if is_env_hibernated(read_env_config(env_location, game, env_id)):
+        return 0
+    content_dir = get_env_content_dir(env_location, game, env_id)
+    real_files = list_env_real_files(content_dir)
+    file_sizes = [os.lstat(os.path.join(content_dir, rel_file)).st_size for rel_file in real_files]
+    total_bytes = sum(file_sizes)
+    compression = get_hibernation_compression()
+    archive_path = get_hibernation_archive(env_location, game, env_id, {"hibernated": {"compression": compression}})
+
+    processed_bytes = 0
+    with tarfile.open(archive_path + ".partial", f"w:{compression}") as archive:
+        for rel_file, file_size in zip(real_files, file_sizes):
+            archive.add(os.path.join(content_dir, rel_file), arcname=rel_file.replace(os.sep, "/"), recursive=False)
+            processed_bytes += file_size
+            if on_progress is not None:
+                on_progress(processed_bytes, total_bytes)
+    os.replace(archive_path + ".partial", archive_path)
+
+    # The env is marked before anything is removed, so an interrupted removal is undone by restoring it
+    update_env_config(os.path.join(env_dir, "DO_NOT_REMOVE.json"), {"hibernated": {"compression": compression, "files": len(real_files), "size": total_bytes}})
+    for rel_file in real_files:
+        os.remove(os.path.join(content_dir, rel_file))
+    invalidate_env_usage(content_dir)
+    logger.info(f"Hibernated {env_dir}: {len(real_files)} files, {format_size(total_bytes)} packed into {format_size(os.path.getsize(archive_path))}")
+    return total_bytes
+
+def write_restored_file(dest_file, data, mode, mtime):
+    with open(dest_file + ".partial", 'wb') as file:
+        file.write(data)
+    os.chmod(dest_file + ".partial", mode)
+    os.utime(dest_file + ".partial", (mtime, mtime))
+    os.replace(dest_file + ".partial", dest_file)
+    return len(data)
+
+@profiled("restore_env")
+def restore_env(config_data, game, env_id, on_progress=None):
+    # Decompressing has to happen in order, the writes don't, so they're handed to the I/O pool while
+    # the archive is read further. Returns whether the env is usable again.
+    env_location = config_data.get("env_location")
+    env_dir = os.path.join(env_location, game, env_id)
+    env_config = read_env_config(env_location, game, env_id)
+    if not is_env_hibernated(env_config):
+        return True
+    content_dir = os.path.abspath(get_env_content_dir(env_location, game, env_id))
+    archive_path = get_hibernation_archive(env_location, game, env_id, env_config)
+    total_bytes = env_config["hibernated"].get("size", 0)
+    operation_log = FileOperationLog(f"Restoring {env_dir} from {archive_path}")
+    progress = {"processed": 0, "in_flight": 0}
+    pending = set()
+    real_dirs = set()
+
+    def collect(done):
+        for future in done:
+            try:
+                progress["processed"] += future.result()
+                operation_log.record("restored")
+            except OSError as e:
+                operation_log.record("errors", logging.ERROR, "Failed to restore a file into %s: %s", env_dir, e)
+            progress["in_flight"] -= future.data_size
+        if on_progress is not None:
+            on_progress(progress["processed"], total_bytes)
+
+    try:
+        with tarfile.open(archive_path, "r:*") as archive:
+            for member in archive:
+                dest_file = os.path.normpath(os.path.join(content_dir, member.name))
+                if not member.isfile() or os.path.commonpath([content_dir, dest_file]) != content_dir:
+                    operation_log.record("skipped", logging.WARNING, "Skipping unexpected archive entry: %s", member.name)
+                    continue
+                rel_dir = os.path.relpath(os.path.dirname(dest_file), content_dir)
+                if rel_dir not in real_dirs:
+                    ensure_real_directory(content_dir, rel_dir)
+                    real_dirs.add(rel_dir)
+                data = archive.extractfile(member).read()
+                future = get_io_executor().submit(write_restored_file, dest_file, data, member.mode, member.mtime)
+                future.data_size = len(data)
+                pending.add(future)
+                progress["in_flight"] += len(data)
+                # Don't keep more of the env in memory than needed when the disk can't keep up
+                while progress["in_flight"] > max_restore_bytes_in_flight:
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    collect(done)
+    except (OSError, tarfile.TarError) as e:
+        operation_log.record("errors", logging.ERROR, "Failed to read %s: %s", archive_path, e)
+    collect(concurrent.futures.wait(pending).done)
+    operation_log.summary()
+    if "errors" in operation_log.counts:
+        return False
+
+    update_env_config(os.path.join(env_dir, "DO_NOT_REMOVE.json"), {"hibernated": False})
+    os.remove(archive_path)
+    invalidate_env_usage(content_dir)
+    return True
+
+mod_marker_directories = ["games", "content", "videos"]
+mod_marker_extensions = [".swf", ".jet", ".json", ".usm"]
+executable_extensions = {".exe", ".dll", ".sh", ".dylib", "_Vulkan", "_OpenGL"}
+shared_library_regex = re.compile(r"\.so(\.\d+)?$")
+
+def find_mod_markers(folder_path, first_only=False):
+    # Returns the relative paths that make a folder look like a Jackbox mod
+    markers = []
+    for root, dirs, files in walk_tree(folder_path):
+        for entry in dirs:
+            if any(entry.name.endswith(marker) for marker in mod_marker_directories):
+                markers.append(os.path.relpath(entry.path, folder_path))
+        for entry in files:
+            if any(entry.name.endswith(extension) for extension in mod_marker_extensions):
+                markers.append(os.path.relpath(entry.path, folder_path))
+        if first_only and markers:
+            break
+    return markers
+
+def find_executables(folder_path):
+    executables = set()
+    for root, _, files in walk_tree(folder_path):
+        for entry in files:
+            if any(entry.name.endswith(extension) for extension in executable_extensions) or shared_library_regex.search(entry.name):
+                executables.add(os.path.relpath(entry.path, folder_path))
+    return executables
+
+def hash_file(path):
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(1024 * 1024):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+_mod_catalog_lock = threading.Lock()
+
+def get_mod_catalog_location():
+    return os.path.join(get_default_config_location(), "mods")
+
+def load_mod_catalog():
+    try:
+        with open(os.path.join(get_mod_catalog_location(), "catalog.json"), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_mod_catalog(catalog):
+    os.makedirs(get_mod_catalog_location(), exist_ok=True)
+    catalog_path = os.path.join(get_mod_catalog_location(), "catalog.json")
+    with open(catalog_path + ".tmp", 'w', encoding='utf-8') as file:
+        json.dump(catalog, file, indent=4)
+    os.replace(catalog_path + ".tmp", catalog_path)
+
+def get_catalog_mod_root(mod_id, mod_info):
+    return os.path.join(get_mod_catalog_location(), mod_id, "files", mod_info.get("root", ""))
+
+def unpack_mod_archive(archive_path, dest_dir):
+    # Mod archives come from anywhere, so nothing in them may end up outside of dest_dir
+    if not zipfile.is_zipfile(archive_path):
+        shutil.unpack_archive(archive_path, dest_dir, filter="data")
+        return
+    dest_dir = os.path.abspath(dest_dir)
+    with zipfile.ZipFile(archive_path) as archive:
+        for member in archive.namelist():
+            member_path = os.path.abspath(os.path.join(dest_dir, member))
+            if os.path.commonpath([dest_dir, member_path]) != dest_dir:
+                raise ValueError(f"{archive_path} has a file outside of the mod folder: {member}")
+        archive.extractall(dest_dir)
+
+@profiled("import_mod_to_catalog")
+def import_mod_to_catalog(source_path, mod_name, game, vanilla_game_path):
+    # Everything injection needs is worked out here once, so injecting doesn't scan the mod again
+    mod_id = str(uuid.uuid4())
+    files_location = os.path.join(get_mod_catalog_location(), mod_id, "files")
+    try:
+        if os.path.isdir(source_path):
+            shutil.copytree(source_path, files_location)
+        else:
+            unpack_mod_archive(source_path, files_location)
+
+        # Archives usually have the whole mod in a single folder
+        root = ""
+        with os.scandir(files_location) as entries:
+            top_level_entries = list(entries)
+        if len(top_level_entries) == 1 and top_level_entries[0].is_dir():
+            root = top_level_entries[0].name
+        mod_root = os.path.join(files_location, root)
+
+        markers = find_mod_markers(mod_root)
+        if not markers:
+            raise ValueError(f"{source_path} doesn't contain a Jackbox mod")
+
+        file_paths = [entry.path for _, _, files in walk_tree(mod_root) for entry in files]
+        file_hashes = get_io_executor().map(hash_file, file_paths)
+        mod_files = {}
+        for file_path, file_hash in zip(file_paths, file_hashes):
+            mod_files[os.path.relpath(file_path, mod_root)] = {"size": os.path.getsize(file_path), "sha256": file_hash}
+
+        overridden_executables = set()
+        if os.path.isdir(vanilla_game_path):
+            overridden_executables = find_executables(mod_root) & find_executables(vanilla_game_path)
+    except Exception:
+        shutil.rmtree(os.path.join(get_mod_catalog_location(), mod_id), ignore_errors=True)
+        raise
+
+    mod_info = {
+        "name": mod_name,
+        "game": game,
+        "source": source_path,
+        "root": root,
+        "imported": time.time(),
+        "size": sum(file_info["size"] for file_info in mod_files.values()),
+        "markers": markers,
+        "overridden_executables": sorted(overridden_executables),
+        "files": mod_files
+    }
+    with _mod_catalog_lock:
+        catalog = load_mod_catalog()
+        catalog[mod_id] = mod_info
+        save_mod_catalog(catalog)
+    logger.info(f"Imported mod {mod_name} ({len(mod_files)} files, {format_size(mod_info["size"])}) into the catalog as {mod_id}")
+    return mod_id, mod_info
+
+def remove_mod_from_catalog(mod_id):
+    with _mod_catalog_lock:
+        catalog = load_mod_catalog()
+        catalog.pop(mod_id, None)
+        save_mod_catalog(catalog)
+    shutil.rmtree(os.path.join(get_mod_catalog_location(), mod_id), ignore_errors=True)
+
+def get_env_diff_root(config_data, game, env_id):
+    # Returns the directory to compare, and whether it only holds what differs from the layer below it
+    if not env_id:
+        return get_game_install_path(config_data, game), False
+    env_dir = os.path.join(config_data.get("env_location"), game, env_id)
+    if read_env_config(config_data.get("env_location"), game, env_id).get("backend") == "overlay":
+        if os.path.ismount(os.path.join(env_dir, "merged")):
+            return os.path.join(env_dir, "merged"), False
+        return os.path.join(env_dir, "upper"), True
+    return env_dir, False
+
+def list_diff_entries(dir_path):
+    try:
+        with os.scandir(dir_path) as entries:
+            return {entry.name: entry for entry in entries if not entry.name.endswith("-log.txt")}
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
+
+def is_overlay_whiteout(entry):
+    try:
+        entry_stat = entry.stat(follow_symlinks=False)
+    except OSError:
+        return False
+    return stat.S_ISCHR(entry_stat.st_mode) and entry_stat.st_rdev == 0
+
+def files_differ(left_file, right_file):
+    left_stat = os.stat(left_file)
+    right_stat = os.stat(right_file)
+    if (left_stat.st_dev, left_stat.st_ino) == (right_stat.st_dev, right_stat.st_ino):
+        return False
+    if left_stat.st_size != right_stat.st_size:
+        return True
+    # Comparing chunk by chunk stops at the first difference instead of hashing both files to the end
+    with open(left_file, 'rb') as left, open(right_file, 'rb') as right:
+        while True:
+            left_chunk = left.read(1024 * 1024)
+            if left_chunk != right.read(1024 * 1024):
+                return True
+            if not left_chunk:
+                return False
+
+def list_tree_files(root, rel_dir):
+    top = os.path.join(root, rel_dir)
+    if not os.path.isdir(top):
+        return [rel_dir]
+    return [os.path.relpath(entry.path, root) for _, _, files in walk_tree(top, follow_symlinks=True) for entry in files]
+
+def diff_env_trees(left_root, right_root, left_sparse=False, right_sparse=False):
+    # Returns the paths only the right side has, the ones both have but differ, and the ones only the left side has.
+    # A sparse side is an overlay upper layer, what it doesn't have comes from below and isn't a difference
+    added, overridden, missing = [], [], []
+    files_to_compare = []
+    pending_dirs = [""]
+    while pending_dirs:
+        rel_dir = pending_dirs.pop()
+        left_entries = list_diff_entries(os.path.join(left_root, rel_dir))
+        right_entries = list_diff_entries(os.path.join(right_root, rel_dir))
+        if rel_dir == "":
+            left_entries.pop("DO_NOT_REMOVE.json", None)
+            right_entries.pop("DO_NOT_REMOVE.json", None)
+
+        for name in right_entries.keys() - left_entries.keys():
+            if is_overlay_whiteout(right_entries[name]):
+                continue
+            if not left_sparse:
+                added.extend(list_tree_files(right_root, os.path.join(rel_dir, name)))
+        for name in left_entries.keys() - right_entries.keys():
+            if is_overlay_whiteout(left_entries[name]):
+                continue
+            if not right_sparse:
+                missing.extend(list_tree_files(left_root, os.path.join(rel_dir, name)))
+
+        for name in left_entries.keys() & right_entries.keys():
+            rel_path = os.path.join(rel_dir, name)
+            left_entry = left_entries[name]
+            right_entry = right_entries[name]
+            if is_overlay_whiteout(right_entry):
+                if not is_overlay_whiteout(left_entry):
+                    missing.extend(list_tree_files(left_root, rel_path))
+                continue
+            if is_overlay_whiteout(left_entry):
+                added.extend(list_tree_files(right_root, rel_path))
+                continue
+            # Links to the same place are the same thing, no matter how big the tree behind them is
+            if (left_entry.is_symlink() or right_entry.is_symlink()) and os.path.realpath(left_entry.path) == os.path.realpath(right_entry.path):
+                continue
+            try:
+                left_is_dir = left_entry.is_dir()
+                right_is_dir = right_entry.is_dir()
+            except OSError:
+                overridden.append(rel_path)
+                continue
+            if left_is_dir and right_is_dir:
+                pending_dirs.append(rel_path)
+            elif left_is_dir or right_is_dir:
+                overridden.append(rel_path)
+            else:
+                files_to_compare.append(rel_path)
+
+    def compare(rel_path):
+        try:
+            return files_differ(os.path.join(left_root, rel_path), os.path.join(right_root, rel_path))
+        except OSError:
+            return True
+
+    for rel_path, differs in zip(files_to_compare, get_io_executor().map(compare, files_to_compare)):
+        if differs:
+            overridden.append(rel_path)
+    return sorted(added), sorted(overridden), sorted(missing)
+
+def get_hibernated_envs(config_data, game, env_ids):
+    return [env_id for env_id in env_ids if env_id and is_env_hibernated(read_env_config(config_data.get("env_location"), game, env_id))]
+
+@profiled("diff_envs")
+def diff_envs(config_data, game, left_env, right_env):
+    # A hibernated env has nothing to compare until its files are back, and restoring can unpack
+    # gigabytes, so that's up to the caller to ask about
+    hibernated_envs = get_hibernated_envs(config_data, game, [left_env, right_env])
+    if hibernated_envs:
+        raise ValueError(f"Can't compare hibernated envs: {", ".join(hibernated_envs)}")
+    left_root, left_sparse = get_env_diff_root(config_data, game, left_env)
+    right_root, right_sparse = get_env_diff_root(config_data, game, right_env)
+    started_at = time.perf_counter()
+    result = diff_env_trees(left_root, right_root, left_sparse, right_sparse)
+    logger.info(f"Compared {left_root} with {right_root} in {time.perf_counter() - started_at:.2f}s: "
+                f"{len(result[0])} added, {len(result[1])} overridden, {len(result[2])} missing")
+    return result
+
+def format_env_diff(added, overridden, missing):
+    return [f"+ {path}" for path in added] + [f"~ {path}" for path in overridden] + [f"- {path}" for path in missing]
+
+def get_sync_link_target(link_target, rel_path, local_base, link_path):
+    # Links made by build_env_structure and ensure_real_directory point at the same path in the layer
+    # below, that layer just lives somewhere else on this machine. Anything else is kept as it is.
+    rel_path = os.path.normpath(rel_path)
+    normalized_target = os.path.normpath(link_target)
+    if normalized_target == rel_path or normalized_target.endswith(os.sep + rel_path):
+        return get_link_value(os.path.join(local_base, rel_path), link_path)
+    return link_target
+
+def remove_sync_entry(entry):
+    if entry.is_dir(follow_symlinks=False):
+        shutil.rmtree(entry.path)
+    else:
+        os.unlink(entry.path)
+
+def plan_env_sync(config_data, source_location, game, env_id, operation_log):
+    # Brings the directories and links of the local copy in line right away, and returns the
+    # real files that still have to be compared, as (source file, target file, target exists)
+    source_dir = os.path.join(source_location, game, env_id)
+    target_dir = os.path.join(config_data.get("env_location"), game, env_id)
+    env_config = read_env_config(source_location, game, env_id)
+    if env_config.get("parent"):
+        local_base = os.path.join(config_data.get("env_location"), game, env_config["parent"])
+    else:
+        local_base = get_game_install_path(config_data, game)
+
+    if not os.path.exists(os.path.join(target_dir, "DO_NOT_REMOVE.json")):
+        os.makedirs(target_dir, exist_ok=True)
+        # Tells the sweep that only the next sync can finish this env
+        journal = {"name": env_config.get("name"), "id": env_id, "game": game, "parent": env_config.get("parent"),
+                   "backend": env_config.get("backend", "symlink"), "pid": os.getpid(), "started": time.time(), "synced_from": source_location}
+        with open(os.path.join(target_dir, env_journal_name), 'w', encoding='utf-8') as file:
+            json.dump(journal, file, indent=4)
+    if env_config.get("backend") == "overlay":
+        # Only the upper layer is the env's own, the rest is put together when it's mounted
+        create_overlay_env_structure(target_dir)
+        pending_dirs = ["upper"]
+    else:
+        pending_dirs = [""]
+
+    files_to_sync = []
+    while pending_dirs:
+        rel_dir = pending_dirs.pop()
+        target_root = os.path.join(target_dir, rel_dir)
+        if os.path.islink(target_root):
+            os.unlink(target_root)
+        os.makedirs(target_root, exist_ok=True)
+        with os.scandir(os.path.join(source_dir, rel_dir)) as entries:
+            source_entries = {entry.name: entry for entry in entries}
+        with os.scandir(target_root) as entries:
+            target_entries = {entry.name: entry for entry in entries}
+        if rel_dir == "":
+            for name in ("DO_NOT_REMOVE.json", env_journal_name):
+                source_entries.pop(name, None)
+                target_entries.pop(name, None)
+
+        for name, entry in source_entries.items():
+            rel_path = os.path.join(rel_dir, name)
+            target_path = os.path.join(target_dir, rel_path)
+            target_entry = target_entries.pop(name, None)
+            try:
+                if entry.is_symlink():
+                    link_target = get_sync_link_target(os.readlink(entry.path), rel_path, local_base, target_path)
+                    if target_entry is not None and target_entry.is_symlink() and os.readlink(target_path) == link_target:
+                        operation_log.record("unchanged")
+                        continue
+                    if target_entry is not None:
+                        remove_sync_entry(target_entry)
+                    os.symlink(link_target, target_path, target_is_directory=os.path.isdir(os.path.join(os.path.dirname(target_path), link_target)))
+                    operation_log.record("linked", logging.DEBUG, "Symlink created: %s -> %s", target_path, link_target)
+                elif entry.is_dir(follow_symlinks=False):
+                    if target_entry is not None and (target_entry.is_symlink() or not target_entry.is_dir(follow_symlinks=False)):
+                        remove_sync_entry(target_entry)
+                    pending_dirs.append(rel_path)
+                elif entry.is_file(follow_symlinks=False):
+                    if target_entry is not None and (target_entry.is_symlink() or not target_entry.is_file(follow_symlinks=False)):
+                        remove_sync_entry(target_entry)
+                        target_entry = None
+                    files_to_sync.append((entry.path, target_path, target_entry is not None))
+                else:
+                    operation_log.record("skipped", logging.WARNING, "Can't sync %s, it's not a file, directory or link", entry.path)
+            except OSError as e:
+                operation_log.record("errors", logging.ERROR, "Failed to sync %s: %s", entry.path, e)
+
+        # What the source doesn't have anymore goes away here too, leftover .partial files included
+        for target_entry in target_entries.values():
+            try:
+                remove_sync_entry(target_entry)
+                operation_log.record("removed", logging.DEBUG, "Removed: %s", target_entry.path)
+            except OSError as e:
+                operation_log.record("errors", logging.ERROR, "Failed to remove %s: %s", target_entry.path, e)
+    return files_to_sync
+
+def sync_file(source_file, target_file, target_exists):
+    # Size first, then the modification time, and only when those disagree is the content compared.
+    # Returns whether the file had to be copied.
+    if target_exists:
+        source_stat = os.stat(source_file)
+        target_stat = os.stat(target_file)
+        if source_stat.st_size == target_stat.st_size:
+            if source_stat.st_mtime_ns == target_stat.st_mtime_ns:
+                return False
+            if not files_differ(source_file, target_file):
+                # Taking over the time means it won't be compared again next time
+                os.utime(target_file, ns=(target_stat.st_atime_ns, source_stat.st_mtime_ns))
+                return False
+    shutil.copy2(source_file, target_file + ".partial")
+    os.replace(target_file + ".partial", target_file)
+    return True
+
+@profiled("sync_env_locations")
+def sync_env_locations(config_data, source_location, on_progress=None, is_canceled=None):
+    # Mirrors every env from another env location into ours. Only changed files are copied, and an
+    # env's config is written last, so running it again after an interruption picks up where it stopped.
+    # Returns how many envs were synced and the file counts.
+    operation_log = FileOperationLog(f"Syncing envs from {source_location}")
+    env_files = {}
+    for game in games:
+        if not has_envs(source_location, game):
+            continue
+        if not os.path.isdir(get_game_install_path(config_data, game)):
+            logger.warning(f"Not syncing the envs of {game}, it's not installed here")
+            continue
+        for env_id, _ in get_env_entries(source_location, game):
+            if os.path.ismount(os.path.join(config_data.get("env_location"), game, env_id, "merged")):
+                logger.warning(f"Not syncing {env_id}, it's in use")
+                continue
+            try:
+                env_files[(game, env_id)] = plan_env_sync(config_data, source_location, game, env_id, operation_log)
+            except OSError as e:
+                operation_log.record("errors", logging.ERROR, "Failed to sync %s: %s", env_id, e)
+            if is_canceled is not None and is_canceled():
+                operation_log.summary()
+                return 0, operation_log.counts
+
+    failed_envs = set()
+    total_files = sum(len(files) for files in env_files.values())
+    processed_files = 0
+    futures = {get_io_executor().submit(sync_file, *file): env for env, files in env_files.items() for file in files}
+    for future in concurrent.futures.as_completed(futures):
+        try:
+            operation_log.record("copied" if future.result() else "unchanged")
+        except concurrent.futures.CancelledError:
+            failed_envs.add(futures[future])
+        except OSError as e:
+            operation_log.record("errors", logging.ERROR, "Failed to copy a file of %s: %s", futures[future][1], e)
+            failed_envs.add(futures[future])
+        processed_files += 1
+        if on_progress is not None:
+            on_progress(processed_files, total_files)
+        if is_canceled is not None and is_canceled():
+            for pending_future in futures:
+                pending_future.cancel()
+
+    synced_envs = 0
+    for game, env_id in env_files:
+        if (game, env_id) in failed_envs:
+            continue
+        target_dir = os.path.join(config_data.get("env_location"), game, env_id)
+        shutil.copy2(os.path.join(source_location, game, env_id, "DO_NOT_REMOVE.json"), os.path.join(target_dir, "DO_NOT_REMOVE.json"))
+        if os.path.exists(os.path.join(target_dir, env_journal_name)):
+            os.remove(os.path.join(target_dir, env_journal_name))
+        invalidate_env_usage(get_env_content_dir(config_data.get("env_location"), game, env_id))
+        synced_envs += 1
+    operation_log.summary()
+    return synced_envs, operation_log.counts
+
+class BackgroundTask(QThread):
+    result_ready = pyqtSignal(object)
+    task_failed = pyqtSignal(str)
+
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+
+    def run(self):
+        try:
+            result = self.function(*self.args)
+        except Exception as e:
+            logger.error(f"Background task {self.function.__name__} failed: {e}")
+            self.task_failed.emit(str(e))
+            return
+        self.result_ready.emit(result)
+
+def run_with_progress(parent, label, function, *args, cancelable=False):
+    # Runs function(*args, on_progress) in the background behind a progress dialog, and returns
+    # its result, or None when it failed. A cancelable function also gets an is_canceled callback.
+    progress_dialog = QProgressDialog(label, "Cancel" if cancelable else None, 0, 100, parent)
+    progress_dialog.setWindowTitle("MultiJack")
+    progress_dialog.setMinimumWidth(400)
+    progress_dialog.setWindowModality(Qt.WindowModality.ApplicationModal)
+    progress_dialog.setValue(0)
+    progress_dialog.show()
+
+    progress = [0, 0]
+    result = []
+    canceled = threading.Event()
+    progress_dialog.canceled.connect(canceled.set)
+
+    def on_progress(processed, total):
+        progress[:] = [processed, total]
+
+    def run_function():
+        if cancelable:
+            result.append(function(*args, on_progress, canceled.is_set))
+        else:
+            result.append(function(*args, on_progress))
+
+    task = BackgroundTask(run_function)
+    task.start()
+    while not task.wait(50):
+        if progress[1]:
+            progress_dialog.setValue(min(99, int((progress[0] / progress[1]) * 100)))
+        QApplication.processEvents()
+    progress_dialog.close()
+    return result[0] if result else None
+
+class EnvListModel(QAbstractListModel):
+    # Shared by the launcher and the env manager, env metadata is read in the background
+    # and only the rows that actually changed are touched
+    envs_loaded = pyqtSignal()
+    EnvIdRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, config_data, game, parent=None):
+        super().__init__(parent)
+        self.config_data = config_data
+        self.env_location = env_location = config_data.get("env_location")
+        self.game = game
+        self.envs = [(None, get_string("vanilla_game"))]
+        self.env_states = {}
+        self.loader = None
+        self.reload_pending = False
+        self.loaded = False
+
+        # Envs created or deleted from somewhere else show up on their own
+        game_env_location = os.path.join(env_location, game)
+        self.watcher = QFileSystemWatcher(self)
+        if os.path.isdir(game_env_location):
+            self.watcher.addPath(game_env_location)
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(500)
+        self.reload_timer.timeout.connect(self.reload)
+        self.watcher.directoryChanged.connect(lambda _: self.reload_timer.start())
+
+        self.reload()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.envs)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.envs):
+            return None
+        env_id, env_name = self.envs[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if self.env_states.get(env_id):
+                return f"{env_name} ({", ".join(get_string(state) for state in self.env_states[env_id])})"
+            return env_name
+        if role == self.EnvIdRole:
+            return env_id
+        return None
+
+    def env_ids(self):
+        return [env_id for env_id, _ in self.envs if env_id is not None]
+
+    def reload(self):
+        if self.loader is not None:
+            self.reload_pending = True
+            return
+        self.loader = BackgroundTask(self.load_envs)
+        self.loader.result_ready.connect(self.apply_env_entries)
+        self.loader.finished.connect(self.on_loader_finished)
+        self.loader.start()
+
+    def on_loader_finished(self):
+        self.loader = None
+        if self.reload_pending:
+            self.reload_pending = False
+            self.reload()
+
+    def load_envs(self):
+        env_entries = get_env_entries(self.env_location, self.game)
+        env_states = {}
+        for env_id, _ in env_entries:
+            env_config = read_env_config(self.env_location, self.game, env_id)
+            states = [state for state, active in (("env_outdated", is_env_stale(self.config_data, self.game, env_config)),
+                                                  ("env_hibernated", is_env_hibernated(env_config))) if active]
+            if states:
+                env_states[env_id] = states
+        return env_entries, env_states
+
+    def apply_env_entries(self, loaded_envs):
+        env_entries, env_states = loaded_envs
+        changed_states = {env_id for env_id in env_states.keys() | self.env_states.keys() if env_states.get(env_id) != self.env_states.get(env_id)}
+        self.env_states = env_states
+        loaded = dict(env_entries)
+        for row in reversed(range(1, len(self.envs))):
+            env_id, env_name = self.envs[row]
+            if env_id not in loaded:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.envs[row]
+                self.endRemoveRows()
+            elif loaded[env_id] != env_name or env_id in changed_states:
+                self.envs[row] = (env_id, loaded[env_id])
+                self.dataChanged.emit(self.index(row), self.index(row))
+
+        known = set(self.env_ids())
+        for env_id, env_name in env_entries:
+            if env_id in known:
+                continue
+            row = len(self.envs)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.envs.append((env_id, env_name))
+            self.endInsertRows()
+
+        game_env_location = os.path.join(self.env_location, self.game)
+        if not self.watcher.directories() and os.path.isdir(game_env_location):
+            self.watcher.addPath(game_env_location)
+        self.loaded = True
+        self.envs_loaded.emit()
+
+    def stop(self):
+        self.reload_timer.stop()
+        self.reload_pending = False
+        if self.loader is not None:
+            self.loader.wait()
+
+def create_env_list_view(env_model, parent):
+    # Returns the filter box and the list, with the vanilla game always on top
+    proxy_model = QSortFilterProxyModel(parent)
+    proxy_model.setSourceModel(env_model)
+    proxy_model.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+
+    filter_edit = QLineEdit(parent)
+    filter_edit.setPlaceholderText(get_string("filter_envs"))
+    filter_edit.textChanged.connect(proxy_model.setFilterFixedString)
+
+    env_view = QListView(parent)
+    env_view.setModel(proxy_model)
+    env_view.setUniformItemSizes(True)
+    env_view.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+    proxy_model.rowsInserted.connect(lambda: None if env_view.currentIndex().isValid() else env_view.setCurrentIndex(proxy_model.index(0, 0)))
+    env_view.setCurrentIndex(proxy_model.index(0, 0))
+    return filter_edit, env_view
+
+def get_selected_env(env_view):
+    # Returns whether anything is selected, and the env ID (None for the vanilla game)
+    index = env_view.currentIndex()
+    if not index.isValid():
+        return False, None
+    return True, index.data(EnvListModel.EnvIdRole)
+
+class BatchEnvCreator(QThread):
+    def __init__(self, config_data, env_name, games_to_create):
+        super().__init__()
+        self.config_data = config_data
+        self.env_name = env_name
+        self.games_to_create = games_to_create
+        self.results = {}
+        self.progress = {}
+        self.progress_lock = threading.Lock()
+        self.canceled = threading.Event()
+
+    def cancel(self):
+        self.canceled.set()
+
+    def get_progress(self):
+        with self.progress_lock:
+            processed_files = sum(processed for processed, _ in self.progress.values())
+            total_files = sum(total for _, total in self.progress.values())
+            return processed_files, total_files, len(self.results)
+
+    def run(self):
+        futures = {get_io_executor().submit(self.create_env_for_game, game): game for game in self.games_to_create}
+        for future in concurrent.futures.as_completed(futures):
+            game = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Failed to create env for {game}: {e}")
+                result = (False, str(e))
+            with self.progress_lock:
+                self.results[game] = result
+
+    def create_env_for_game(self, game):
+        if self.canceled.is_set():
+            return False, get_string("batch_canceled")
+        src_dir = get_game_install_path(self.config_data, game)
+        if not os.path.isdir(src_dir):
+            return False, get_string("batch_game_not_found")
+
+        def on_progress(processed_files, total_files, file_name):
+            with self.progress_lock:
+                self.progress[game] = (processed_files, total_files)
+
+        env_id, specific_env_location = create_env_directory(self.config_data.get("env_location"), game, self.env_name)
+        finished = build_env(self.config_data, game, env_id, on_progress=on_progress, is_canceled=self.canceled.is_set)
+        if not finished or os.listdir(specific_env_location) == []:
+            shutil.rmtree(specific_env_location, ignore_errors=True)
+            return False, get_string("batch_canceled") if self.canceled.is_set() else get_string("env_creation_failed")
+        write_env_config(specific_env_location, self.env_name, env_id, game, buildid=get_game_buildid(self.config_data, game))
+        return True, env_id
+
+class ControllerListener(QObject):
+    hat_signal = pyqtSignal(int)
+    button_signal = pyqtSignal()
+    exit_signal = pyqtSignal()
+
+    stick_threshold = 0.5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.devices = {}
+        self.stick_directions = {}
+        self.open_retries = {}
+        self.stopped = False
+
+        # Reading happens straight in the Qt event loop whenever a device has something for us,
+        # and watching /dev/input is enough to notice controllers being plugged in or out
+        self.device_watcher = QFileSystemWatcher(self)
+        if os.path.isdir("/dev/input"):
+            self.device_watcher.addPath("/dev/input")
+        self.device_watcher.directoryChanged.connect(self.scan_devices)
+        self.scan_devices()
+
+    def scan_devices(self):
+        if self.stopped:
+            return
+        try:
+            present_devices = set(evdev.list_devices())
+        except OSError as e:
+            logger.error(f"Failed to list input devices: {e}")
+            return
+
+        for path in list(self.devices):
+            if path not in present_devices:
+                self.remove_device(path)
+
+        for path in present_devices - self.devices.keys():
+            try:
+                device = evdev.InputDevice(path)
+            except PermissionError:
+                # udev might not have fixed up the permissions of a freshly plugged in device yet
+                retries = self.open_retries.get(path, 0)
+                if retries < 3:
+                    self.open_retries[path] = retries + 1
+                    QTimer.singleShot(500, self.scan_devices)
+                continue
+            except OSError:
+                continue
+
+            if not self.is_gamepad(device):
+                device.close()
+                continue
+
+            notifier = QSocketNotifier(device.fd, QSocketNotifier.Type.Read, self)
+            notifier.activated.connect(lambda _, p=path: self.read_events(p))
+            self.devices[path] = (device, notifier)
+            self.open_retries.pop(path, None)
+            logger.info(f"Controller connected: {device.name} ({path})")
+
+    def is_gamepad(self, device):
+        keys = device.capabilities().get(evdev.ecodes.EV_KEY, [])
+        return evdev.ecodes.BTN_SOUTH in keys or evdev.ecodes.BTN_JOYSTICK in keys
+
+    def remove_device(self, path):
+        device, notifier = self.devices.pop(path)
+        notifier.setEnabled(False)
+        notifier.deleteLater()
+        self.stick_directions.pop(path, None)
+        try:
+            device.close()
+        except OSError:
+            pass
+        logger.info(f"Controller disconnected: {path}")
+
+    def read_events(self, path):
+        if path not in self.devices:
+            return
+        device = self.devices[path][0]
+        try:
+            for event in device.read():
+                self.handle_event(path, device, event)
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.remove_device(path)
+
+    def handle_event(self, path, device, event):
+        ecodes = evdev.ecodes
+        if event.type == ecodes.EV_KEY and event.value == 1:
+            if event.code == ecodes.BTN_SOUTH:
+                self.button_signal.emit()
+            elif event.code == ecodes.BTN_EAST:
+                self.exit_signal.emit()
+            elif event.code == ecodes.BTN_DPAD_UP:
+                self.hat_signal.emit(Qt.Key.Key_Up)
+            elif event.code == ecodes.BTN_DPAD_DOWN:
+                self.hat_signal.emit(Qt.Key.Key_Down)
+        elif event.type == ecodes.EV_ABS:
+            if event.code == ecodes.ABS_HAT0Y:
+                if event.value < 0:
+                    self.hat_signal.emit(Qt.Key.Key_Up)
+                elif event.value > 0:
+                    self.hat_signal.emit(Qt.Key.Key_Down)
+            elif event.code == ecodes.ABS_Y:
+                absinfo = device.absinfo(ecodes.ABS_Y)
+                center = (absinfo.max + absinfo.min) / 2
+                half_range = (absinfo.max - absinfo.min) / 2 or 1
+                position = (event.value - center) / half_range
+                direction = -1 if position < -self.stick_threshold else 1 if position > self.stick_threshold else 0
+                # Only move once per push of the stick
+                if direction != self.stick_directions.get(path, 0):
+                    self.stick_directions[path] = direction
+                    if direction == -1:
+                        self.hat_signal.emit(Qt.Key.Key_Up)
+                    elif direction == 1:
+                        self.hat_signal.emit(Qt.Key.Key_Down)
+
+    def stop(self):
+        if self.stopped:
+            return
+        self.stopped = True
+        self.device_watcher.directoryChanged.disconnect(self.scan_devices)
+        for path in list(self.devices):
+            self.remove_device(path)
+
+
+def get_prefetch_data_location(game, env_id):
+    return os.path.join(get_default_config_location(), "prefetch", game, f"{env_id or "vanilla"}.json")
+
+def load_prefetch_data(game, env_id):
+    try:
+        with open(get_prefetch_data_location(game, env_id), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return {"launches": 0, "files": {}, "load_times": []}
+
+def warm_up_file(file_path):
+    with open(file_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        else:
+            # No way to just hint the OS here, so read through it to get it cached
+            while file.read(1024 * 1024):
+                pass
+    return size
+
+class AssetPrefetcher(threading.Thread):
+    # Warms up the page cache with the files the game loaded the last few times, then
+    # watches what the game opens this time so the list stays up to date.
+    max_prefetch_bytes = 2 * 1024 * 1024 * 1024
+    max_watch_seconds = 90
+    settle_seconds = 15
+
+    def __init__(self, game, env_id, root, prefetch_enabled):
+        super().__init__(name="MultiJack asset prefetch", daemon=True)
+        self.game = game
+        self.env_id = env_id
+        # The paths the game opens are reported with every link resolved
+        self.root = os.path.realpath(root)
+        self.prefetch_enabled = prefetch_enabled
+        self.process = None
+        self.launched_at = None
+        self.process_attached = threading.Event()
+
+    def attach(self, process):
+        self.process = process
+        self.launched_at = time.monotonic()
+        self.process_attached.set()
+
+    def run(self):
+        data = load_prefetch_data(self.game, self.env_id)
+        if self.prefetch_enabled and data.get("files"):
+            self.prefetch(data["files"])
+        if self.process_attached.wait(timeout=30):
+            self.watch(data)
+
+    def prefetch(self, files):
+        started_at = time.monotonic()
+        prefetched_files = 0
+        prefetched_bytes = 0
+        for relative_path, _ in sorted(files.items(), key=lambda item: item[1], reverse=True):
+            if prefetched_bytes >= self.max_prefetch_bytes:
+                break
+            try:
+                prefetched_bytes += warm_up_file(os.path.join(self.root, relative_path))
+                prefetched_files += 1
+            except OSError:
+                continue
+        logger.info(f"Prefetched {prefetched_files} files ({prefetched_bytes // (1024 * 1024)} MiB) in {time.monotonic() - started_at:.2f}s")
+
+    def get_open_files(self):
+        open_files = set()
+        try:
+            parent = psutil.Process(self.process.pid)
+            processes = [parent] + parent.children(recursive=True)
+        except psutil.Error:
+            return None
+        for process in processes:
+            try:
+                open_files.update(f.path for f in process.open_files())
+            except psutil.Error:
+                continue
+        return open_files
+
+    def to_relative_path(self, file_path, vanilla_root):
+        for root in (self.root, vanilla_root):
+            if root and os.path.commonpath([root, file_path]) == root:
+                return os.path.relpath(file_path, root)
+        return None
+
+    def watch(self, data):
+        # Files opened through the env's symlinks show up with their vanilla path
+        vanilla_root = None
+        if self.env_id:
+            with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
+                vanilla_root = os.path.realpath(get_game_install_path(json.load(config_file), self.game))
+
+        seen_files = set()
+        last_new_file_at = self.launched_at
+        while time.monotonic() - self.launched_at < self.max_watch_seconds:
+            if self.process.poll() is not None and not psutil.pid_exists(self.process.pid):
+                break
+            open_files = self.get_open_files()
+            if open_files is None:
+                break
+            for file_path in open_files:
+                relative_path = self.to_relative_path(os.path.realpath(file_path), vanilla_root)
+                if relative_path and relative_path not in seen_files:
+                    seen_files.add(relative_path)
+                    last_new_file_at = time.monotonic()
+            if seen_files and time.monotonic() - last_new_file_at > self.settle_seconds:
+                break
+            time.sleep(0.25)
+
+        if not seen_files:
+            return
+        load_time = last_new_file_at - self.launched_at
+        logger.info(f"Game finished loading assets {load_time:.2f}s after launch (prefetch {"on" if self.prefetch_enabled else "off"})")
+
+        files = data.get("files", {})
+        for relative_path in seen_files:
+            files[relative_path] = files.get(relative_path, 0) + 1
+        data["files"] = files
+        data["launches"] = data.get("launches", 0) + 1
+        data["load_times"] = (data.get("load_times", []) + [{"prefetch": self.prefetch_enabled, "seconds": round(load_time, 3)}])[-20:]
+        try:
+            os.makedirs(os.path.dirname(get_prefetch_data_location(self.game, self.env_id)), exist_ok=True)
+            # Written next to it first, the thread can be cut off when MultiJack quits
+            with open(get_prefetch_data_location(self.game, self.env_id) + ".partial", 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(get_prefetch_data_location(self.game, self.env_id) + ".partial", get_prefetch_data_location(self.game, self.env_id))
+        except OSError as e:
+            logger.error(f"Failed to save the prefetch list: {e}")
+
+_launch_metrics_lock = threading.Lock()
+max_launch_metrics_bytes = 2 * 1024 * 1024
+
+def get_launch_metrics_location():
+    return os.path.join(get_default_config_location(), "launch_metrics.jsonl")
+
+class LaunchTimer:
+    # Collects when each launch stage was reached, in milliseconds since the launcher process was started
+    def __init__(self, started_at):
+        self.started_at = started_at
+        self.stages = {}
+        self.saved = False
+
+    def mark(self, stage):
+        self.stages.setdefault(stage, round((time.time() - self.started_at) * 1000))
+
+    def save(self, game, env_id, **details):
+        if self.saved:
+            return
+        self.saved = True
+        record = {"time": round(self.started_at), "game": game, "env": env_id or "", "stages": self.stages}
+        record.update(details)
+        logger.info(f"Launch stages (ms): {self.stages}")
+        metrics_location = get_launch_metrics_location()
+        with _launch_metrics_lock:
+            try:
+                with open(metrics_location, 'a', encoding='utf-8') as metrics_file:
+                    metrics_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+                if os.path.getsize(metrics_location) > max_launch_metrics_bytes:
+                    with open(metrics_location, 'r', encoding='utf-8') as metrics_file:
+                        records = metrics_file.readlines()
+                    with open(metrics_location, 'w', encoding='utf-8') as metrics_file:
+                        metrics_file.writelines(records[len(records) // 2:])
+            except OSError as e:
+                logger.error(f"Failed to save launch metrics: {e}")
+
+class LaunchLatencyTracker(threading.Thread):
+    # Waits for the game to start its first child process before the launch is saved
+    max_wait_seconds = 60
+
+    def __init__(self, process, launch_timer, game, env_id, **details):
+        super().__init__(name="MultiJack launch latency", daemon=True)
+        self.process = process
+        self.launch_timer = launch_timer
+        self.game = game
+        self.env_id = env_id
+        self.details = details
+
+    def run(self):
+        deadline = time.monotonic() + self.max_wait_seconds
+        while time.monotonic() < deadline and self.process.poll() is None:
+            try:
+                if psutil.Process(self.process.pid).children():
+                    self.launch_timer.mark("first_child")
+                    break
+            except psutil.Error:
+                break
+            time.sleep(0.02)
+        self.launch_timer.save(self.game, self.env_id, **self.details)
+
+def load_launch_metrics():
+    records = []
+    try:
+        with open(get_launch_metrics_location(), 'r', encoding='utf-8') as metrics_file:
+            for line in metrics_file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return records
+
+def get_percentile(values, percentile):
+    values = sorted(values)
+    return values[max(0, min(len(values) - 1, math.ceil(percentile / 100 * len(values)) - 1))]
+
+def summarize_launch_metrics(records, env_location=None):
+    # Returns lines with the 50th, 90th and 99th percentile of every stage per game and env
+    env_names = {}
+    grouped = {}
+    for record in records:
+        game = record.get("game", "")
+        env_id = record.get("env", "")
+        if env_location and game not in env_names:
+            env_names[game] = dict(get_env_entries(env_location, game))
+        grouped.setdefault((game, env_id), []).append(record.get("stages", {}))
+
+    lines = []
+    for (game, env_id), stages_list in sorted(grouped.items()):
+        env_name = env_names.get(game, {}).get(env_id, env_id) if env_id else get_string("vanilla_game")
+        lines.append(f"{game} / {env_name} ({len(stages_list)} launches)")
+        stage_names = []
+        for stages in stages_list:
+            stage_names += [stage for stage in stages if stage not in stage_names]
+        for stage in stage_names:
+            values = [stages[stage] for stages in stages_list if stage in stages]
+            lines.append(f"    {stage}: p50 {get_percentile(values, 50)} ms, p90 {get_percentile(values, 90)} ms, p99 {get_percentile(values, 99)} ms")
+    return lines
 
 class LaunchEnvWindow(QDialog):
-    def __init__(self):
+    def __init__(self, game_path, temp_launch=None, launch_env=None, env_model=None, resident=False, launch_timer=None):
         super().__init__()
 
-        self.game = os.path.basename(os.path.dirname(sys.argv[-1]))
-        self.envs, self.env_ids = get_available_envs(self.game)
-        if len(self.envs) == 0:
-            self.launch_environment(None)
-            sys.exit(1)
+        self.launch_timer = launch_timer or LaunchTimer(get_process_start_time())
+        self.game_path = game_path
+        self.game = os.path.basename(os.path.dirname(game_path))
+        self.launch_env = launch_env
+        self.resident = resident
+        self.temp_launch = temp_launch if temp_launch and temp_launch[0] == self.game else None
+        self.env_model = env_model
+        self.owns_env_model = env_model is None
+        with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
+            self.config_data = json.load(config_file)
+        self.env_location = self.config_data.get("env_location")
 
         self.setWindowTitle("MultiJack")
         self.setGeometry(100, 100, 500, 200)
 
+    def start(self):
+        # Launches right away when there's nothing to pick, returns whether the picker is shown
+        if not self.game:
+            logger.error("There's no game specified!")
+            return False
+        if self.temp_launch:
+            logger.info(f"Silently launching {self.game} (env: {self.temp_launch[1]})")
+            self.launch_environment(self.temp_launch[1])
+            return False
+        if not has_envs(self.env_location, self.game):
+            self.launch_timer.mark("envs_listed")
+            self.launch_environment(None)
+            return False
+
+        logger.info("Preparing env selection...")
         layout = QVBoxLayout(self)
         self.label = QLabel(get_string("select_env_to_launch"), self)
         layout.addWidget(self.label)
 
-        self.env_list = QListWidget(self)
-        if not self.game:
-            logger.error("There's no game specified!")
-            sys.exit(1)
-        try:
-            if isinstance(_temp_launch, (list, tuple)) and len(_temp_launch) >= 1:
-                if _temp_launch[0] == self.game:
-                    logger.info(f"Silently launching {self.game} (env: {_temp_launch[1]})")
-                    self.launch_environment(_temp_launch[1])
-                    sys.exit(1)
-        except NameError:
-            logger.info("Preparing env selection...")
-        self.env_list.addItem(get_string("vanilla_game"))
-        self.env_list.addItems(self.envs)
+        if self.env_model is None:
+            self.env_model = EnvListModel(self.config_data, self.game, self)
+        if self.env_model.loaded:
+            self.launch_timer.mark("envs_listed")
+        else:
+            self.env_model.envs_loaded.connect(lambda: self.launch_timer.mark("envs_listed"))
+        self.filter_edit, self.env_list = create_env_list_view(self.env_model, self)
+        self.filter_edit.returnPressed.connect(self.launch_environment_button)
+        layout.addWidget(self.filter_edit)
         layout.addWidget(self.env_list)
 
         self.launch_button = QPushButton(get_string("launch_env"), self)
@@ -270,60 +2907,255 @@ class LaunchEnvWindow(QDialog):
         self.env_list.setFocus()
 
         if sys.platform == "linux":
-            self.controller_thread = ControllerListener()
-            self.controller_thread.hat_signal.connect(self.simulate_key_press)
-            self.controller_thread.button_signal.connect(self.launch_environment_button)
-            self.controller_thread.exit_signal.connect(QApplication.quit)
-            self.controller_thread.start()
+            self.controller_listener = ControllerListener(self)
+            self.controller_listener.hat_signal.connect(self.simulate_key_press)
+            self.controller_listener.button_signal.connect(self.launch_environment_button)
+            self.controller_listener.exit_signal.connect(self.close if self.resident else QApplication.quit)
+
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        return True
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        self.launch_timer.mark("ui_shown")
 
     def simulate_key_press(self, key):
         event = QKeyEvent(QEvent.Type.KeyPress, key, Qt.KeyboardModifier.NoModifier)
         QApplication.postEvent(self.env_list, event)
 
-    def navigate_menu_controller(self, hat):
-        if hat.y == 1:
-            self.simulate_key_press(Qt.Key.Key_Up)
-        elif hat.y == -1:
-            self.simulate_key_press(Qt.Key.Key_Down)
+    def stop_controller_listener(self):
+        if getattr(self, "controller_listener", None) is not None:
+            self.controller_listener.stop()
+
+    def closeEvent(self, event):
+        self.stop_controller_listener()
+        if self.env_model is not None and self.owns_env_model:
+            self.env_model.stop()
+        super().closeEvent(event)
 
     def launch_environment_button(self):
-        selected_env = self.env_list.currentItem()
-        if selected_env:
-            env_name = selected_env.text()
-            env_id = self.env_ids.get(env_name)
-            logging.info(f"Launching environment: {env_name} with ID: {env_id}")
+        selected, env_id = get_selected_env(self.env_list)
+        if selected:
+            self.launch_timer.mark("user_selected")
+            logging.info(f"Launching environment: {self.env_list.currentIndex().data()} with ID: {env_id}")
             self.launch_environment(env_id)
 
+    @profiled("launch_environment")
     def launch_environment(self, env_id):
         with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
             config_data = json.load(config_file)
         if env_id is None:
             env_id = ""
         env_config_location = os.path.join(config_data.get("env_location"), self.game, env_id, "DO_NOT_REMOVE.json")
-        current_launch_options = ""
-        try:
-            if _temp_launch[2]:
-                current_launch_options = _temp_launch[2]
-        except NameError:
-            if os.path.exists(env_config_location):
+        env_config = {}
+        if os.path.exists(env_config_location):
+            try:
                 env_config = json.load(open(env_config_location, 'r'))
-                if env_config.get("launch_options"):
-                    current_launch_options = env_config.get("launch_options")
+            except json.JSONDecodeError:
+                logging.error(f"Failed to read {env_config_location}")
+        if env_id and is_env_hibernated(env_config):
+            logging.info(f"Restoring hibernated env {env_id} before launching it")
+            if not run_with_progress(self, get_string("restoring_env"), restore_env, config_data, self.game, env_id):
+                QMessageBox.critical(self, "MultiJack", get_string("env_restore_failed"))
+                return
+            self.launch_timer.mark("env_restored")
+            env_config = read_env_config(config_data.get("env_location"), self.game, env_id)
+        if env_id and is_env_stale(config_data, self.game, env_config):
+            logging.warning(f"Env {env_id} was built for build {env_config.get("buildid")}, the game is now on {get_game_buildid(config_data, self.game)}")
+            response = QMessageBox.question(self, "MultiJack", get_string("env_outdated_launch_anyway"), QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if response != QMessageBox.StandardButton.Yes:
+                return
+        current_launch_options = ""
+        if self.temp_launch and self.temp_launch[2]:
+            current_launch_options = self.temp_launch[2]
+        elif env_config.get("launch_options"):
+            current_launch_options = env_config.get("launch_options")
+
+        command_prefix = []
+        overlay_dir = None
+        if env_id == "":
+            game_root = os.path.dirname(self.game_path)
+        elif env_config.get("backend") == "overlay":
+            overlay_dir = os.path.join(config_data.get("env_location"), self.game, env_id, "merged")
+            try:
+                command_prefix, needs_unmount = prepare_overlay_env(config_data, self.game, env_id)
+            except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+                logging.error(f"Failed to mount overlay env: {e}")
+                QMessageBox.critical(self, "MultiJack", get_string("overlay_mount_failed"))
+                return
+            if not needs_unmount:
+                overlay_dir = None
+            game_root = os.path.join(config_data.get("env_location"), self.game, env_id, "merged")
+        else:
+            game_root = os.path.join(config_data.get("env_location"), self.game, env_id)
+        asset_prefetcher = None
+        if env_config.get("prefetch") or config_data.get("measure_asset_load_times"):
+            asset_prefetcher = AssetPrefetcher(self.game, env_id, game_root, bool(env_config.get("prefetch")))
+
         if env_id == "":
             logging.info("Launching vanilla game.")
             if current_launch_options != "":
                 logging.info(f"Launch options: {current_launch_options}")
-            subprocess.Popen([os.path.join(os.path.dirname(sys.argv[-1]), get_default_game_executable(self.game))] + current_launch_options.split(), cwd=os.path.dirname(sys.argv[-1]), start_new_session=True)
+            self.stop_controller_listener()
+            if asset_prefetcher is not None:
+                asset_prefetcher.start()
+            process = self.spawn_game([os.path.join(game_root, get_default_game_executable(self.game))] + current_launch_options.split(), game_root, env_config)
         else:
-            env_launcher = os.path.join(config_data.get("env_location"), self.game, env_id, get_default_game_executable(self.game))
-            if not os.path.exists(env_launcher):
+            env_launcher = os.path.join(game_root, get_default_game_executable(self.game))
+            # With unshare the overlay is only mounted inside the game's namespace, so there's nothing to check here
+            if not command_prefix and not os.path.exists(env_launcher):
                 logging.error("Executable not found.")
+                if overlay_dir is not None:
+                    unmount_overlay_env(overlay_dir)
                 QMessageBox.critical(self, "MultiJack", get_string("executable_not_found"))
                 return
             logging.info(f"Launching executable: {env_launcher}")
-            subprocess.Popen([env_launcher] + current_launch_options.split(), cwd=os.path.dirname(env_launcher), start_new_session=True)
+            self.stop_controller_listener()
+            if asset_prefetcher is not None:
+                asset_prefetcher.start()
+            if command_prefix:
+                command_prefix = command_prefix + [os.path.dirname(env_launcher)]
+            process = self.spawn_game(command_prefix + [env_launcher] + current_launch_options.split(), os.path.dirname(env_launcher), env_config)
+            if overlay_dir is not None:
+                OverlayUnmounter(process, overlay_dir).start()
+
+        if asset_prefetcher is not None:
+            # A one-shot launch waits for the prefetcher before exiting, so it can see the game finish loading
+            asset_prefetcher.attach(process)
+
+        launch_details = {"resident": self.resident, "silent": bool(self.temp_launch)}
+        if config_data.get("track_launch_latency"):
+            LaunchLatencyTracker(process, self.launch_timer, self.game, env_id, **launch_details).start()
+        else:
+            self.launch_timer.save(self.game, env_id, **launch_details)
 
         self.close()
+        if not self.resident:
+            QApplication.quit()
+
+    def spawn_game(self, command, cwd, env_config):
+        launch_profile = env_config.get("launch_profile") or {}
+        profile_prefix, creationflags, remaining_profile = get_launch_profile_command(launch_profile)
+        launch_env = self.launch_env
+        if launch_profile.get("env"):
+            launch_env = dict(self.launch_env or os.environ)
+            launch_env.update({str(key): str(value) for key, value in launch_profile["env"].items()})
+        if launch_profile:
+            logging.info(f"Launch profile: {launch_profile}")
+        # Its own session, like before launch profiles, so the game outlives MultiJack and the picker's terminal
+        process = subprocess.Popen(profile_prefix + command, cwd=cwd, env=launch_env, creationflags=creationflags, start_new_session=True)
+        self.launch_timer.mark("popen_returned")
+        apply_launch_profile(process.pid, remaining_profile)
+        return process
+
+
+class ResidentLauncher(QObject):
+    # Keeps Qt, the config and the env lists loaded, so -launcher only has to pass its arguments over
+    def __init__(self, config_data):
+        super().__init__()
+        self.config_data = config_data
+        self.token = secrets.token_hex(16)
+        self.env_models = {}
+        self.windows = []
+
+        self.server = QTcpServer(self)
+        self.server.newConnection.connect(self.accept_connections)
+        if not self.server.listen(QHostAddress(QHostAddress.SpecialAddress.LocalHost), 0):
+            raise RuntimeError(self.server.errorString())
+        self.write_resident_file()
+        logger.info(f"Resident launcher listening on port {self.server.serverPort()}")
+
+        for game in get_installed_games(config_data, refresh=False):
+            self.get_env_model(game)
+
+        self.tray_icon = None
+        if QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray_icon = QSystemTrayIcon(QApplication.style().standardIcon(QStyle.StandardPixmap.SP_ComputerIcon), self)
+            self.tray_icon.setToolTip("MultiJack")
+            self.tray_menu = QMenu()
+            quit_action = QAction(get_string("quit_resident_launcher"), self.tray_menu)
+            quit_action.triggered.connect(self.quit)
+            self.tray_menu.addAction(quit_action)
+            self.tray_icon.setContextMenu(self.tray_menu)
+            self.tray_icon.show()
+
+    def get_resident_file_location(self):
+        return os.path.join(get_default_config_location(), "resident.json")
+
+    def write_resident_file(self):
+        resident_file_location = self.get_resident_file_location()
+        # Only we should be able to read the token
+        file_descriptor = os.open(resident_file_location + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as resident_file:
+            json.dump({"pid": os.getpid(), "port": self.server.serverPort(), "token": self.token}, resident_file)
+        os.replace(resident_file_location + ".tmp", resident_file_location)
+
+    def get_env_model(self, game):
+        key = (self.config_data.get("env_location"), game)
+        if key not in self.env_models:
+            self.env_models[key] = EnvListModel(self.config_data, game, self)
+        return self.env_models[key]
+
+    def accept_connections(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            request_buffer = bytearray()
+            connection.readyRead.connect(lambda connection=connection, request_buffer=request_buffer: self.read_request(connection, request_buffer))
+            connection.disconnected.connect(connection.deleteLater)
+
+    def read_request(self, connection, request_buffer):
+        request_buffer.extend(bytes(connection.readAll()))
+        if b"\n" not in request_buffer:
+            if len(request_buffer) > 1024 * 1024:
+                connection.abort()
+            return
+        try:
+            request = json.loads(request_buffer.split(b"\n", 1)[0])
+        except ValueError:
+            connection.abort()
+            return
+        if not isinstance(request, dict) or not hmac.compare_digest(str(request.get("token", "")), self.token):
+            logger.warning("Rejected a launcher request with a wrong token")
+            connection.abort()
+            return
+        # The launch counts from when Steam started the -launcher process, which is still waiting for us
+        launch_timer = LaunchTimer(get_process_start_time(request.get("pid")) if request.get("pid") else time.time())
+        connection.write(b"ok\n")
+        connection.disconnectFromHost()
+
+        argv = request.get("argv") or []
+        if argv:
+            self.open_launcher(argv, request.get("env"), launch_timer)
+
+    def open_launcher(self, argv, launch_env, launch_timer):
+        global _selected_language
+        with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
+            self.config_data = json.load(config_file)
+        launch_timer.mark("config_loaded")
+        _selected_language = self.config_data.get("language")
+        temp_launch = None
+        if self.config_data.get("temp_launch"):
+            temp_launch = self.config_data.get("temp_launch")
+            set_config_option({"temp_launch": []})
+
+        game = os.path.basename(os.path.dirname(argv[-1]))
+        logger.info(f"Got a launch request for {game}")
+        window = LaunchEnvWindow(argv[-1], temp_launch, launch_env, self.get_env_model(game), resident=True, launch_timer=launch_timer)
+        if window.start():
+            self.windows.append(window)
+            window.finished.connect(lambda _, window=window: self.windows.remove(window))
+
+    def quit(self):
+        try:
+            with open(self.get_resident_file_location(), 'r', encoding='utf-8') as resident_file:
+                if json.load(resident_file).get("token") == self.token:
+                    os.remove(self.get_resident_file_location())
+        except (OSError, ValueError):
+            pass
+        for env_model in self.env_models.values():
+            env_model.stop()
         QApplication.quit()
 
 
@@ -498,7 +3330,12 @@ class mj_install_location_config_window(QMainWindow):
         layout.addWidget(continue_button)
 
     def setinstall_location(self):
-        set_config_option({"install_location": self.set_location_lineedit.text()})
+        old_install_location = self.config_data.get("install_location")
+        new_install_location = self.set_location_lineedit.text()
+        set_config_option({"install_location": new_install_location})
+        # The envs still link into the old install location, they're pointed at the new one instead of being recreated
+        if old_install_location and self.config_data.get("env_location") and os.path.normpath(old_install_location) != os.path.normpath(new_install_location):
+            run_with_progress(self, get_string("retargeting_envs"), retarget_env_links, self.config_data.get("env_location"), old_install_location, new_install_location, None)
         self.close()
         if self.config_data.get("language") == "":
             self.open_language_selection_window = mj_language_selection_window()
@@ -525,9 +3362,9 @@ class mj_install_location_config_window(QMainWindow):
                 self.set_location_lineedit.setText(folder_path)
 
     def validate_folder(self, folder_path):
-        for root, dirs, files in os.walk(folder_path):
-            for dir_name in dirs:
-                if any(dir_name.startswith(prefix) for prefix in ["The Jackbox", "Quiplash", "Fibbage", "Drawful"]):
+        for root, dirs, files in walk_tree(folder_path):
+            for entry in dirs:
+                if any(entry.name.startswith(prefix) for prefix in ["The Jackbox", "Quiplash", "Fibbage", "Drawful"]):
                     return True
         return False
 
@@ -591,15 +3428,20 @@ class mj_env_location_config_window(QMainWindow):
             self.set_location_lineedit.setText(folder_path)
 
 class MJMainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, config_data=None):
         super().__init__()
 
-        with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
-            self.config_data = json.load(config_file)
-        self.add_launch_option()
+        if config_data is None:
+            with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
+                config_data = json.load(config_file)
+        self.config_data = config_data
 
         self.env_dialog = None
+        self.env_model = None
         self.about_window = None
+        self.background_tasks = []
+        self.first_paint_logged = False
+        self.moved_installs_checked = False
 
         self.setWindowTitle("MultiJack")
         self.setGeometry(100, 100, 600, 200)
@@ -615,35 +3457,233 @@ class MJMainWindow(QMainWindow):
         welcome_back_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(welcome_back_label)
 
-        game_grid = QGridLayout()
-        layout.addLayout(game_grid)
+        self.game_grid = QGridLayout()
+        layout.addLayout(self.game_grid)
+
+        # Paint with whatever the last scan found, the real scan happens once we're on screen
+        self.populate_game_grid(get_installed_games(self.config_data, refresh=False))
+
+        button_layout = QHBoxLayout()
+
+        batch_create_button = QPushButton(get_string("batch_create_env"), self)
+        batch_create_button.clicked.connect(self.batch_create_env)
+        button_layout.addWidget(batch_create_button)
+
+        largest_envs_button = QPushButton(get_string("largest_envs"), self)
+        largest_envs_button.clicked.connect(self.show_largest_envs)
+        button_layout.addWidget(largest_envs_button)
+
+        sync_envs_button = QPushButton(get_string("sync_envs"), self)
+        sync_envs_button.clicked.connect(self.sync_envs)
+        button_layout.addWidget(sync_envs_button)
+
+        launch_metrics_button = QPushButton(get_string("launch_metrics"), self)
+        launch_metrics_button.clicked.connect(self.show_launch_metrics)
+        button_layout.addWidget(launch_metrics_button)
+
+        about_button = QPushButton(get_string("about"), self)
+        about_button.setFixedSize(100, 30)
+        about_button.clicked.connect(self.open_about_window)
+        button_layout.addWidget(about_button)
+
+        button_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addLayout(button_layout)
+
+        QTimer.singleShot(0, self.start_background_tasks)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_paint_logged:
+            self.first_paint_logged = True
+            logger.info(f"Main window painted {get_time_since_process_start() * 1000:.0f} ms after process start")
+
+    def closeEvent(self, event):
+        for task in self.background_tasks:
+            task.wait()
+        super().closeEvent(event)
+
+    def run_in_background(self, function, *args, on_result=None):
+        task = BackgroundTask(function, *args)
+        if on_result is not None:
+            task.result_ready.connect(on_result)
+        task.finished.connect(lambda: self.background_tasks.remove(task))
+        self.background_tasks.append(task)
+        task.start()
+        return task
+
+    def start_background_tasks(self):
+        self.run_in_background(get_installed_games, self.config_data, on_result=self.on_installed_games_scanned)
+        self.run_in_background(find_launch_option_updates, self.config_data, on_result=self.add_launch_option)
+        self.run_in_background(sweep_incomplete_envs, self.config_data, on_result=self.reclaim_orphaned_envs)
+
+    def reclaim_orphaned_envs(self, orphaned_envs):
+        if not orphaned_envs:
+            return
+        logger.info(f"Found {len(orphaned_envs)} orphaned env folders: {orphaned_envs}")
+        response = QMessageBox.question(self, "MultiJack", get_string("orphaned_envs_found").format(len(orphaned_envs)) + "\n\n" + "\n".join(orphaned_envs[:10]), QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if response != QMessageBox.StandardButton.Yes:
+            return
+
+        def remove_orphaned_envs():
+            for env_dir in orphaned_envs:
+                shutil.rmtree(env_dir, ignore_errors=True)
+                logger.info(f"Removed orphaned env folder: {env_dir}")
+
+        self.run_in_background(remove_orphaned_envs)
+
+    def on_installed_games_scanned(self, installed_games):
+        self.populate_game_grid(installed_games)
+        self.check_moved_installs()
+
+    def check_moved_installs(self):
+        # Only asked about once per run, the scan that notices the moves happens at startup
+        moved_games = _game_index.get("moved_games")
+        if not moved_games or self.moved_installs_checked:
+            return
+        self.moved_installs_checked = True
+        response = QMessageBox.question(self, "MultiJack", get_string("moved_installs_found") + "\n\n" + "\n".join(sorted(moved_games)), QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if response != QMessageBox.StandardButton.Yes:
+            return
+        self.run_in_background(retarget_moved_installs, self.config_data)
+
+    def populate_game_grid(self, installed_games):
+        self.installed_games = list(installed_games)
+        while self.game_grid.count():
+            item = self.game_grid.takeAt(0)
+            if item.widget() is not None:
+                item.widget().deleteLater()
+
+        for index, game in enumerate(installed_games):
+            row = index // 3
+            col = index % 3
+
+            button = QPushButton(game)
+            button.setFixedSize(190, 32)
+            button.setStyleSheet("text-align: center; padding: 5px;")
+            button.clicked.connect(lambda _, g=game: self.manage_env(g))
+
+            self.game_grid.addWidget(button, row, col)
+
+    def show_largest_envs(self):
+        def on_result(all_env_usage):
+            if not all_env_usage:
+                QMessageBox.information(self, "MultiJack", get_string("no_envs"))
+                return
+            summary = [f"{format_size(size)} - {game}: {env_name}" for size, game, env_name in all_env_usage[:10]]
+            total = sum(size for size, _, _ in all_env_usage)
+            QMessageBox.information(self, "MultiJack", f"{get_string("largest_envs")}\n\n" + "\n".join(summary) + f"\n\n{get_string("disk_usage")}: {format_size(total)}")
+
+        self.run_in_background(get_all_env_usage, self.config_data.get("env_location"), on_result=on_result)
+
+    def sync_envs(self):
+        source_location = QFileDialog.getExistingDirectory(self, get_string("sync_envs_from"))
+        if not source_location:
+            return
+        if os.path.realpath(source_location) == os.path.realpath(self.config_data.get("env_location")):
+            QMessageBox.warning(self, "MultiJack", get_string("sync_envs_same_location"))
+            return
+        response = QMessageBox.question(self, "MultiJack", get_string("sync_envs_confirm"), QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if response != QMessageBox.StandardButton.Yes:
+            return
+
+        result = run_with_progress(self, get_string("syncing_envs"), sync_env_locations, self.config_data, source_location, cancelable=True)
+        if result is None:
+            QMessageBox.critical(self, "MultiJack", get_string("sync_envs_failed"))
+            return
+        synced_envs, counts = result
+        details = ", ".join(f"{outcome}: {count}" for outcome, count in sorted(counts.items()))
+        if "errors" in counts:
+            QMessageBox.warning(self, "MultiJack", f"{get_string("sync_envs_incomplete")}\n\n{details}")
+        else:
+            QMessageBox.information(self, "MultiJack", f"{get_string("sync_envs_success").replace("%COUNT%", str(synced_envs))}\n\n{details}")
+        if self.env_model is not None:
+            self.env_model.reload()
+
+    def show_launch_metrics(self):
+        def on_result(summary):
+            if not summary:
+                QMessageBox.information(self, "MultiJack", get_string("no_launch_metrics"))
+                return
+            metrics_dialog = QDialog(self)
+            metrics_dialog.setWindowTitle("MultiJack")
+            metrics_dialog.setGeometry(100, 100, 600, 400)
+            metrics_layout = QVBoxLayout(metrics_dialog)
+            metrics_list = QListWidget(metrics_dialog)
+            metrics_list.addItems(summary)
+            metrics_layout.addWidget(metrics_list)
+            close_button = QPushButton(get_string("close"), metrics_dialog)
+            close_button.clicked.connect(metrics_dialog.close)
+            metrics_layout.addWidget(close_button)
+            metrics_dialog.exec()
+
+        self.run_in_background(lambda: summarize_launch_metrics(load_launch_metrics(), self.config_data.get("env_location")), on_result=on_result)
+
+    def batch_create_env(self):
+        batch_dialog = QDialog(self)
+        batch_dialog.setWindowTitle("MultiJack")
+        batch_dialog.setGeometry(100, 100, 400, 300)
+        batch_layout = QVBoxLayout(batch_dialog)
+
+        batch_layout.addWidget(QLabel(get_string("name_env"), batch_dialog))
+        env_name_lineedit = QLineEdit(batch_dialog)
+        batch_layout.addWidget(env_name_lineedit)
+
+        batch_layout.addWidget(QLabel(get_string("batch_select_games"), batch_dialog))
+        game_list = QListWidget(batch_dialog)
+        for game in self.installed_games:
+            item = QListWidgetItem(game, game_list)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+        batch_layout.addWidget(game_list)
+
+        create_button = QPushButton(get_string("create_env"), batch_dialog)
+        create_button.clicked.connect(batch_dialog.accept)
+        batch_layout.addWidget(create_button)
+
+        if batch_dialog.exec() != QDialog.DialogCode.Accepted:
+            return
 
-        installed_games = []
-        for game in os.listdir(self.config_data.get("install_location", [])):
-            if os.path.isdir(os.path.join(self.config_data.get("install_location", []), game)) and game in games:
-                installed_games.append(game)
-        installed_games.sort()
+        env_name = env_name_lineedit.text()
+        selected_games = [game_list.item(row).text() for row in range(game_list.count()) if game_list.item(row).checkState() == Qt.CheckState.Checked]
+        if not env_name.strip() or env_name in selected_games:
+            QMessageBox.warning(self, "MultiJack", get_string("invalid_name_env"))
+            return
+        if not selected_games:
+            QMessageBox.warning(self, "MultiJack", get_string("batch_no_games_selected"))
+            return
 
-        for index, game in enumerate(installed_games):
-            row = index // 3
-            col = index % 3
+        progress_dialog = QProgressDialog(get_string("processing"), "Cancel", 0, 100, self)
+        progress_dialog.setWindowTitle("MultiJack")
+        progress_dialog.setMinimumWidth(400)
+        progress_dialog.setWindowModality(Qt.WindowModality.ApplicationModal)
+        progress_dialog.setValue(0)
+        progress_dialog.show()
 
-            button = QPushButton(game)
-            button.setFixedSize(190, 32)
-            button.setStyleSheet("text-align: center; padding: 5px;")
-            button.clicked.connect(lambda _, g=game: self.manage_env(g))
+        batch_creator = BatchEnvCreator(self.config_data, env_name, selected_games)
+        progress_dialog.canceled.connect(batch_creator.cancel)
 
-            game_grid.addWidget(button, row, col)
+        def update_progress():
+            processed_files, total_files, finished_games = batch_creator.get_progress()
+            if total_files:
+                progress_dialog.setValue(min(99, int((processed_files / total_files) * 100)))
+            progress_dialog.setLabelText(f"{get_string("processing")}: {finished_games}/{len(selected_games)}")
 
-        button_layout = QHBoxLayout()
+        progress_timer = QTimer(self)
+        progress_timer.timeout.connect(update_progress)
+        progress_timer.start(100)
 
-        about_button = QPushButton(get_string("about"), self)
-        about_button.setFixedSize(100, 30)
-        about_button.clicked.connect(self.open_about_window)
-        button_layout.addWidget(about_button)
+        batch_creator.start()
+        while not batch_creator.wait(50):
+            QApplication.processEvents()
+        progress_timer.stop()
+        progress_dialog.close()
 
-        button_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addLayout(button_layout)
+        report = []
+        for game in selected_games:
+            succeeded, message = batch_creator.results.get(game, (False, get_string("batch_canceled")))
+            report.append(f"{game}: {get_string("batch_succeeded") if succeeded else f"{get_string("batch_failed")} ({message})"}")
+        logger.info("Batch env creation finished:\n" + "\n".join(report))
+        QMessageBox.information(self, "MultiJack", get_string("batch_report") + "\n\n" + "\n".join(report))
 
     def open_about_window(self):
         if self.about_window is None or not self.about_window.isVisible():
@@ -697,9 +3737,7 @@ class MJMainWindow(QMainWindow):
         try:
             if os.path.exists(os.path.join(get_default_config_location())):
                 #Windows will complain that it can't delete the log file because it's in use
-                for handler in logger.handlers[:]:
-                    handler.close()
-                    logger.removeHandler(handler)
+                shutdown_logging()
                 logging.shutdown()
 
                 shutil.rmtree(os.path.join(get_default_config_location()))
@@ -724,54 +3762,152 @@ class MJMainWindow(QMainWindow):
         game_label = QLabel(self)
         game_label.setText(get_string("game") + ": " + game)
 
-        env_list = QListWidget(self.env_dialog)
-        envs_array = self.get_envs(game)
-        env_names = {}
-        env_list.addItem(get_string("vanilla_game"))
-        for env in envs_array:
-            env_check = os.path.join(self.config_data.get("env_location"), game, env, "DO_NOT_REMOVE.json")
-            if os.path.isfile(env_check):
-                with open(env_check, 'r', encoding='utf-8') as env_info_file:
-                    env_info = json.load(env_info_file)
-                env_names[env_info.get("name")] = env
-                env_list.addItem(env_info.get("name"))
-            else:
-                envs_array.remove(env)
+        os.makedirs(os.path.join(self.config_data.get("env_location"), game), exist_ok=True)
+        env_model = EnvListModel(self.config_data, game, self.env_dialog)
+        self.env_model = env_model
+        filter_edit, env_list = create_env_list_view(env_model, self.env_dialog)
 
         layout.addWidget(game_label)
 
+        layout.addWidget(filter_edit)
         layout.addWidget(env_list)
 
+        usage_label = QLabel(get_string("disk_usage") + ": -", self.env_dialog)
+        layout.addWidget(usage_label)
+        env_usage = {}
+        env_dialog = self.env_dialog
+
+        def show_env_usage():
+            if self.env_dialog is not env_dialog:
+                return
+            selected, env = get_selected_env(env_list)
+            env_dir = get_env_content_dir(self.config_data.get("env_location"), game, env) if env else None
+            if env_dir in env_usage:
+                usage_label.setText(f"{get_string("disk_usage")}: {format_size(env_usage[env_dir])}")
+            elif env_dir:
+                usage_label.setText(f"{get_string("disk_usage")}: {get_string("calculating")}")
+            else:
+                usage_label.setText(get_string("disk_usage") + ": -")
+
+        def on_env_usage(usage):
+            env_usage.update(usage)
+            show_env_usage()
+
+        def measure_env_usage_in_background():
+            env_dirs = [get_env_content_dir(self.config_data.get("env_location"), game, env) for env in env_model.env_ids()]
+            env_dirs = [env_dir for env_dir in env_dirs if env_dir not in env_usage]
+            if env_dirs:
+                self.run_in_background(get_env_usage, env_dirs, on_result=on_env_usage)
+
+        env_list.selectionModel().currentChanged.connect(lambda *_: show_env_usage())
+        env_model.envs_loaded.connect(measure_env_usage_in_background)
+        self.env_dialog.finished.connect(lambda _: env_model.stop())
+
         open_folder_button = QPushButton(get_string("open_folder"), self)
-        open_folder_button.clicked.connect(lambda: self.open_selected_folder(game, env_list, env_names))
+        open_folder_button.clicked.connect(lambda: self.open_selected_folder(game, env_list))
         layout.addWidget(open_folder_button)
 
-        if len(envs_array) > 0:
-            inject_mod_button = QPushButton(get_string("inject_mod_into_env"), self)
-            inject_mod_button.clicked.connect(lambda: self.inject_mod_into_selected_env(game, env_list, env_names))
-            layout.addWidget(inject_mod_button)
+        inject_mod_button = QPushButton(get_string("inject_mod_into_env"), self)
+        inject_mod_button.clicked.connect(lambda: self.inject_mod_into_selected_env(game, env_list))
+        layout.addWidget(inject_mod_button)
 
-            delete_env_button = QPushButton(get_string("delete_env"), self)
-            delete_env_button.clicked.connect(lambda: self.delete_env(game, env_names.get(env_list.currentItem().text()), env_list, env_names))
-            layout.addWidget(delete_env_button)
+        delete_env_button = QPushButton(get_string("delete_env"), self)
+        delete_env_button.clicked.connect(lambda: self.delete_env(game, get_selected_env(env_list)[1]))
+        layout.addWidget(delete_env_button)
 
         add_launch_options_to_env_button = QPushButton(get_string("change_launch_options"), self)
-        add_launch_options_to_env_button.clicked.connect(lambda: self.add_launch_options_to_env_dialog(game, env_list, env_names))
+        add_launch_options_to_env_button.clicked.connect(lambda: self.add_launch_options_to_env_dialog(game, env_list))
         layout.addWidget(add_launch_options_to_env_button)
 
+        launch_profile_button = QPushButton(get_string("launch_profile"), self)
+        launch_profile_button.clicked.connect(lambda: self.launch_profile_dialog(game, env_list))
+        layout.addWidget(launch_profile_button)
+
+        steam_shortcut_button = QPushButton(get_string("steam_shortcut"), self)
+        steam_shortcut_button.clicked.connect(lambda: self.toggle_env_shortcut(game, env_list))
+        layout.addWidget(steam_shortcut_button)
+
+        hibernate_env_button = QPushButton(get_string("hibernate_env"), self)
+        hibernate_env_button.clicked.connect(lambda: self.toggle_env_hibernation(game, env_list))
+        layout.addWidget(hibernate_env_button)
+
+        toggle_prefetch_button = QPushButton(get_string("toggle_prefetch"), self)
+        toggle_prefetch_button.clicked.connect(lambda: self.toggle_prefetch(game, env_list))
+        layout.addWidget(toggle_prefetch_button)
+
+        diff_env_button = QPushButton(get_string("diff_env"), self)
+        diff_env_button.clicked.connect(lambda: self.diff_selected_env(game, env_list))
+        layout.addWidget(diff_env_button)
+
+        import_mod_button = QPushButton(get_string("import_mod_to_catalog"), self)
+        import_mod_button.clicked.connect(lambda: self.import_mod_to_catalog(game))
+        layout.addWidget(import_mod_button)
+
+        inject_catalog_mod_button = QPushButton(get_string("inject_catalog_mod"), self)
+        inject_catalog_mod_button.clicked.connect(lambda: self.inject_catalog_mod(game, get_selected_env(env_list)[1]))
+        layout.addWidget(inject_catalog_mod_button)
+
         create_env_button = QPushButton(get_string("create_env"), self)
         create_env_button.clicked.connect(lambda _, g=game: self.create_env(g))
         layout.addWidget(create_env_button)
 
         self.env_dialog.exec()
 
-    def add_launch_options_to_env_dialog(self, game, env_list, env_names):
-        if self.launch_options_dialog is None or not self.launch_options_dialog.isVisible():
-            selected_row = env_list.currentRow()
-            if selected_row >= 0:
-                selected_name = env_list.item(selected_row).text()
-                env_to_be_modified = env_names.get(selected_name)
+    def diff_selected_env(self, game, env_list):
+        selected, env = get_selected_env(env_list)
+        if not selected or env is None:
+            QMessageBox.warning(self, "MultiJack", get_string("select_env_error"))
+            return
+        other_envs = {get_string("vanilla_game"): None}
+        for env_id, env_name in get_env_entries(self.config_data.get("env_location"), game):
+            if env_id != env:
+                other_envs[env_name] = env_id
+        other_name, ok = QInputDialog.getItem(self, "MultiJack", get_string("diff_against"), list(other_envs), 0, False)
+        if not ok:
+            return
+        hibernated_envs = get_hibernated_envs(self.config_data, game, [env, other_envs[other_name]])
+        if hibernated_envs:
+            response = QMessageBox.question(self, "MultiJack", get_string("diff_restore_hibernated"), QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if response != QMessageBox.StandardButton.Yes:
+                return
+            for env_id in hibernated_envs:
+                if not run_with_progress(self, get_string("restoring_env"), restore_env, self.config_data, game, env_id):
+                    QMessageBox.critical(self, "MultiJack", get_string("env_restore_failed"))
+                    return
+            self.refresh_env_model(game)
+
+        progress_dialog = QProgressDialog(get_string("comparing_envs"), "Cancel", 0, 0, self)
+        progress_dialog.setCancelButton(None)
+        progress_dialog.setWindowTitle("MultiJack")
+        progress_dialog.setMinimumWidth(400)
+        progress_dialog.setWindowModality(Qt.WindowModality.ApplicationModal)
+        progress_dialog.show()
 
+        def show_env_diff(result):
+            progress_dialog.close()
+            diff_lines = format_env_diff(*result)
+            diff_dialog = QDialog(self)
+            diff_dialog.setWindowTitle("MultiJack")
+            diff_dialog.setGeometry(100, 100, 600, 400)
+            diff_layout = QVBoxLayout(diff_dialog)
+            diff_layout.addWidget(QLabel(f"{env_list.currentIndex().data()} / {other_name}: {len(result[0])} {get_string("diff_added")}, "
+                                         f"{len(result[1])} {get_string("diff_overridden")}, {len(result[2])} {get_string("diff_missing")}", diff_dialog))
+            diff_list = QListWidget(diff_dialog)
+            diff_list.setUniformItemSizes(True)
+            diff_list.addItems(diff_lines or [get_string("diff_identical")])
+            diff_layout.addWidget(diff_list)
+            close_button = QPushButton(get_string("close"), diff_dialog)
+            close_button.clicked.connect(diff_dialog.close)
+            diff_layout.addWidget(close_button)
+            diff_dialog.exec()
+
+        diff_task = self.run_in_background(diff_envs, self.config_data, game, other_envs[other_name], env, on_result=show_env_diff)
+        diff_task.task_failed.connect(lambda error: (progress_dialog.close(), QMessageBox.critical(self, "MultiJack", error)))
+
+    def add_launch_options_to_env_dialog(self, game, env_list):
+        if self.launch_options_dialog is None or not self.launch_options_dialog.isVisible():
+            selected, env_to_be_modified = get_selected_env(env_list)
+            if selected:
                 if env_to_be_modified is None:
                     env_to_be_modified = ""
                 self.env_config_location = os.path.join(self.config_data.get("env_location"), game, env_to_be_modified, "DO_NOT_REMOVE.json")
@@ -779,7 +3915,7 @@ class MJMainWindow(QMainWindow):
                 if os.path.exists(self.env_config_location):
                     current_launch_options = json.load(open(self.env_config_location, 'r')).get("launch_options")
 
-                if env_to_be_modified or selected_name == get_string("vanilla_game"):
+                if env_to_be_modified == "" or os.path.exists(self.env_config_location):
                     self.launch_options_dialog = QDialog(self)
                     self.launch_options_dialog.setWindowTitle("MultiJack")
                     self.launch_options_dialog.setGeometry(100, 100, 400, 100)
@@ -807,26 +3943,170 @@ class MJMainWindow(QMainWindow):
     def add_launch_options_dialog_handler(self):
         add_launch_options_to_env(self.env_config_location, self.set_launch_options_lineedit.text())
 
-    def inject_mod_into_selected_env(self, game, env_list, env_names):
-        selected_row = env_list.currentRow()
-        if selected_row >= 0:
-            selected_name = env_list.item(selected_row).text()
-            env_to_inject = env_names.get(selected_name)
+    def launch_profile_dialog(self, game, env_list):
+        selected, env = get_selected_env(env_list)
+        if not selected:
+            QMessageBox.warning(self, "MultiJack", get_string("select_env_error"))
+            return
+        env_config_location = os.path.join(self.config_data.get("env_location"), game, env or "", "DO_NOT_REMOVE.json")
+        launch_profile = {}
+        if os.path.exists(env_config_location):
+            with open(env_config_location, 'r', encoding='utf-8') as env_info_file:
+                launch_profile = json.load(env_info_file).get("launch_profile") or {}
+
+        profile_dialog = QDialog(self)
+        profile_dialog.setWindowTitle("MultiJack")
+        profile_dialog.setGeometry(100, 100, 400, 300)
+        profile_layout = QVBoxLayout(profile_dialog)
+
+        profile_layout.addWidget(QLabel(get_string("launch_profile_nice"), profile_dialog))
+        nice_lineedit = QLineEdit(profile_dialog)
+        nice_lineedit.setText("" if launch_profile.get("nice") is None else str(launch_profile.get("nice")))
+        profile_layout.addWidget(nice_lineedit)
+
+        profile_layout.addWidget(QLabel(get_string("launch_profile_ionice"), profile_dialog))
+        ionice_combobox = QComboBox(profile_dialog)
+        ionice_combobox.addItems([""] + list(ionice_classes))
+        ionice_combobox.setCurrentText(launch_profile.get("ionice_class") or "")
+        profile_layout.addWidget(ionice_combobox)
+        ionice_level_lineedit = QLineEdit(profile_dialog)
+        ionice_level_lineedit.setPlaceholderText("0-7")
+        ionice_level_lineedit.setText("" if launch_profile.get("ionice_level") is None else str(launch_profile.get("ionice_level")))
+        profile_layout.addWidget(ionice_level_lineedit)
+
+        profile_layout.addWidget(QLabel(get_string("launch_profile_cpu_affinity"), profile_dialog))
+        cpu_affinity_lineedit = QLineEdit(profile_dialog)
+        cpu_affinity_lineedit.setPlaceholderText(f"0-{max(get_available_cpus())}")
+        cpu_affinity_lineedit.setText(",".join(str(cpu) for cpu in launch_profile.get("cpu_affinity") or []))
+        profile_layout.addWidget(cpu_affinity_lineedit)
+
+        profile_layout.addWidget(QLabel(get_string("launch_profile_env"), profile_dialog))
+        env_vars_textedit = QPlainTextEdit(profile_dialog)
+        env_vars_textedit.setPlainText("\n".join(f"{key}={value}" for key, value in (launch_profile.get("env") or {}).items()))
+        profile_layout.addWidget(env_vars_textedit)
+
+        save_button = QPushButton(get_string("save"), profile_dialog)
+        save_button.clicked.connect(profile_dialog.accept)
+        profile_layout.addWidget(save_button)
+        if profile_dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        new_profile = {}
+        try:
+            if nice_lineedit.text().strip():
+                new_profile["nice"] = max(-20, min(19, int(nice_lineedit.text())))
+            if ionice_combobox.currentText():
+                new_profile["ionice_class"] = ionice_combobox.currentText()
+                if ionice_level_lineedit.text().strip():
+                    new_profile["ionice_level"] = max(0, min(7, int(ionice_level_lineedit.text())))
+            if cpu_affinity_lineedit.text().strip():
+                new_profile["cpu_affinity"] = parse_cpu_list(cpu_affinity_lineedit.text())
+                unavailable_cpus = set(new_profile["cpu_affinity"]) - get_available_cpus()
+                if unavailable_cpus:
+                    QMessageBox.warning(self, "MultiJack", get_string("launch_profile_unavailable_cpus").replace("%CPUS%", ", ".join(str(cpu) for cpu in sorted(unavailable_cpus))))
+                    return
+            env_vars = {}
+            for line in env_vars_textedit.toPlainText().splitlines():
+                if not line.strip():
+                    continue
+                key, value = line.split("=", 1)
+                if not key.strip():
+                    raise ValueError(f"Invalid environment variable: {line}")
+                env_vars[key.strip()] = value
+            if env_vars:
+                new_profile["env"] = env_vars
+        except ValueError as e:
+            logger.error(f"Invalid launch profile: {e}")
+            QMessageBox.warning(self, "MultiJack", get_string("invalid_launch_profile"))
+            return
+        update_env_config(env_config_location, {"launch_profile": new_profile})
+
+    def toggle_env_shortcut(self, game, env_list):
+        selected, env = get_selected_env(env_list)
+        if not selected:
+            QMessageBox.warning(self, "MultiJack", get_string("select_env_error"))
+            return
+        if env is None:
+            QMessageBox.warning(self, "MultiJack", get_string("cant_modify_vanilla"))
+            return
+        # Overlay envs have to be mounted by MultiJack first, so they can't be started directly
+        if read_env_config(self.config_data.get("env_location"), game, env).get("backend") == "overlay":
+            QMessageBox.warning(self, "MultiJack", get_string("overlay_env_no_shortcut"))
+            return
+
+        remove = has_env_shortcut(self.config_data, game, env)
+        response = QMessageBox.question(self, "MultiJack", get_string("remove_steam_shortcut" if remove else "add_steam_shortcut"), QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if response != QMessageBox.StandardButton.Yes or not self.wait_for_steam_to_close():
+            return
+        if update_env_shortcuts(self.config_data, game, env, remove):
+            QMessageBox.information(self, "MultiJack", get_string("steam_shortcut_removed" if remove else "steam_shortcut_added"))
+        else:
+            QMessageBox.critical(self, "MultiJack", get_string("steam_shortcut_failed"))
+
+    def toggle_env_hibernation(self, game, env_list):
+        selected, env = get_selected_env(env_list)
+        if not selected:
+            QMessageBox.warning(self, "MultiJack", get_string("select_env_error"))
+            return
+        if env is None:
+            QMessageBox.warning(self, "MultiJack", get_string("cant_modify_vanilla"))
+            return
+
+        env_location = self.config_data.get("env_location")
+        if is_env_hibernated(read_env_config(env_location, game, env)):
+            if run_with_progress(self, get_string("restoring_env"), restore_env, self.config_data, game, env):
+                QMessageBox.information(self, "MultiJack", get_string("env_restored"))
+            else:
+                QMessageBox.critical(self, "MultiJack", get_string("env_restore_failed"))
+            self.refresh_env_model(game)
+            return
+
+        # Children link straight into this env's files, and a mounted overlay is in use
+        if get_child_envs(env_location, game, env):
+            QMessageBox.warning(self, "MultiJack", get_string("cant_hibernate_env_with_children"))
+            return
+        if os.path.ismount(os.path.join(env_location, game, env, "merged")):
+            QMessageBox.warning(self, "MultiJack", get_string("env_in_use"))
+            return
+        response = QMessageBox.question(self, "MultiJack", get_string("hibernate_env_confirm"), QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if response != QMessageBox.StandardButton.Yes:
+            return
+        packed_bytes = run_with_progress(self, get_string("hibernating_env"), hibernate_env, self.config_data, game, env)
+        if packed_bytes is None:
+            QMessageBox.critical(self, "MultiJack", get_string("env_hibernation_failed"))
+        else:
+            archive_size = os.path.getsize(get_hibernation_archive(env_location, game, env))
+            QMessageBox.information(self, "MultiJack", f"{get_string("env_hibernated_success")} {format_size(packed_bytes)} -> {format_size(archive_size)}")
+        self.refresh_env_model(game)
+
+    def toggle_prefetch(self, game, env_list):
+        selected, env_to_be_modified = get_selected_env(env_list)
+        if not selected:
+            QMessageBox.warning(self, "MultiJack", get_string("select_env_error"))
+            return
+
+        env_config_location = os.path.join(self.config_data.get("env_location"), game, env_to_be_modified or "", "DO_NOT_REMOVE.json")
+        prefetch = False
+        if os.path.exists(env_config_location):
+            with open(env_config_location, 'r', encoding='utf-8') as env_info_file:
+                prefetch = bool(json.load(env_info_file).get("prefetch"))
+        update_env_config(env_config_location, {"prefetch": not prefetch})
+        QMessageBox.information(self, "MultiJack", get_string("prefetch_disabled" if prefetch else "prefetch_enabled"))
+
+    def inject_mod_into_selected_env(self, game, env_list):
+        selected, env_to_inject = get_selected_env(env_list)
+        if selected:
             if env_to_inject:
                 self.inject_mod_into_env(game, env_to_inject)
-            elif selected_name == get_string("vanilla_game"):
-                QMessageBox.warning(self, "MultiJack", get_string("cant_modify_vanilla"))
             else:
-                QMessageBox.warning(self, "MultiJack", get_string("env_not_found_error"))
+                QMessageBox.warning(self, "MultiJack", get_string("cant_modify_vanilla"))
         else:
             QMessageBox.warning(self, "MultiJack", get_string("select_env_error"))
 
-    def open_selected_folder(self, game, env_list, env_names):
-        selected_row = env_list.currentRow()
-        if selected_row >= 0:
-            selected_name = env_list.item(selected_row).text()
-            env_to_open = env_names.get(selected_name)
-            vanilla_folder_path = os.path.join(self.config_data.get("install_location"), game)
+    def open_selected_folder(self, game, env_list):
+        selected, env_to_open = get_selected_env(env_list)
+        if selected:
+            vanilla_folder_path = get_game_install_path(self.config_data, game)
             if env_to_open:
                 env_folder_path = os.path.join(self.config_data.get("env_location"), game, env_to_open)
                 if os.path.exists(env_folder_path):
@@ -842,12 +4122,20 @@ class MJMainWindow(QMainWindow):
                 elif os.name == 'posix':
                     subprocess.Popen(['open', vanilla_folder_path] if sys.platform == 'darwin' else ['xdg-open', vanilla_folder_path])
 
-    def delete_env(self, game, env, env_list=None, env_names=None):
+    def delete_env(self, game, env):
         if env is None:
             QMessageBox.warning(self, "MultiJack", get_string("cant_delete_vanilla"))
             return
         env_path = os.path.join(self.config_data.get("env_location"), game, env)
 
+        if get_child_envs(self.config_data.get("env_location"), game, env):
+            QMessageBox.warning(self, "MultiJack", get_string("env_has_children"))
+            return
+
+        if os.path.ismount(os.path.join(env_path, "merged")):
+            QMessageBox.warning(self, "MultiJack", get_string("env_in_use"))
+            return
+
         if os.path.exists(env_path):
             mod_msg = QMessageBox()
             mod_msg.setIcon(QMessageBox.Icon.Information)
@@ -857,17 +4145,19 @@ class MJMainWindow(QMainWindow):
             response = mod_msg.exec()
             if response != QMessageBox.StandardButton.Yes:
                 return
+            # Leaving the shortcut would only leave a broken entry in Steam, but Steam has to be closed to remove it
+            if not is_steam_running() and has_env_shortcut(self.config_data, game, env):
+                update_env_shortcuts(self.config_data, game, env, remove=True)
             shutil.rmtree(env_path, ignore_errors=True)
             logger.info(f"Deleted environment: {env_path}")
         else:
             logger.warning(f"Environment folder not found: {env_path}")
 
-        if env_list and env_names:
-            selected_row = env_list.currentRow()
-            if selected_row >= 0:
-                env_list.takeItem(selected_row)
+        self.refresh_env_model(game)
 
-        self.manage_env(game)
+    def refresh_env_model(self, game):
+        if self.env_model is not None and self.env_model.game == game:
+            self.env_model.reload()
 
     def get_envs(self, game):
         if not os.path.exists(self.config_data.get("env_location")):
@@ -886,43 +4176,69 @@ class MJMainWindow(QMainWindow):
 
         return envs
 
-    def is_steam_running(self):
-        match sys.platform:
-            case "win32":
-                steam = "steam.exe"
-            case "darwin":
-                steam = "steam_osx"
-            case "linux":
-                steam = "steamwebhelper"
-        for process in psutil.process_iter(["name"]):
-            if steam in process.info["name"].lower():
-                return True
-        return False
+    def wait_for_steam_to_close(self):
+        while is_steam_running():
+            close_steam_msg = QMessageBox()
+            close_steam_msg.setIcon(QMessageBox.Icon.Warning)
+            close_steam_msg.setWindowTitle("MultiJack")
+            close_steam_msg.setText(get_string("steam_is_running"))
+            close_steam_msg.setInformativeText(get_string("waiting_for_steam_to_close"))
+            close_steam_msg.setStandardButtons(QMessageBox.StandardButton.Retry | QMessageBox.StandardButton.Cancel)
+
+            steam_watcher = SteamExitWatcher()
+            steam_watcher.steam_exited.connect(lambda: close_steam_msg.done(QMessageBox.StandardButton.Retry))
+            steam_watcher.start()
+            response = close_steam_msg.exec()
+            steam_watcher.stop()
+
+            if response == QMessageBox.StandardButton.Cancel:
+                return False
+        return True
 
     def create_env(self, game):
         env_name, ok = QInputDialog.getText(self, "MultiJack", get_string("name_env"))
         if not ok or not env_name.strip() or env_name == game:
             QMessageBox.warning(self, "MultiJack", get_string("invalid_name_env"))
             return
-        game_env_location = os.path.join(self.config_data.get("env_location"), game)
-        if not os.path.exists(game_env_location):
-            os.makedirs(game_env_location)
-        env_id = str(uuid.uuid4())
-        while os.path.exists(os.path.join(game_env_location, env_id)):
-            env_id = str(uuid.uuid4())
-        specific_env_location = os.path.join(game_env_location, env_id)
-        os.makedirs(specific_env_location)
-        self.recreate_directory_structure(os.path.join(self.config_data.get("install_location", []), game), specific_env_location)
-        if os.listdir(specific_env_location) != []:
-            data = {
-                "name": env_name,
-                "id": env_id,
-                "game": game,
-                "version": 0
-            }
-            with open(os.path.join(specific_env_location, "DO_NOT_REMOVE.json"), 'w') as file:
-                json.dump(data, file, indent=4)
-            logger.info(f"Config file for env created successfully!")
+        parent_env = None
+        existing_envs = {}
+        for env in self.get_envs(game):
+            with open(os.path.join(self.config_data.get("env_location"), game, env, "DO_NOT_REMOVE.json"), 'r', encoding='utf-8') as env_info_file:
+                existing_envs[json.load(env_info_file).get("name", env)] = env
+        if existing_envs:
+            base_name, ok = QInputDialog.getItem(self, "MultiJack", get_string("base_env_on"), [get_string("vanilla_game")] + list(existing_envs), 0, False)
+            if not ok:
+                return
+            parent_env = existing_envs.get(base_name)
+        if parent_env and is_env_hibernated(read_env_config(self.config_data.get("env_location"), game, parent_env)):
+            # The new env links into the parent's files, so they have to be there
+            if not run_with_progress(self, get_string("restoring_env"), restore_env, self.config_data, game, parent_env):
+                QMessageBox.critical(self, "MultiJack", get_string("env_restore_failed"))
+                return
+
+        backend = "symlink"
+        if parent_env and read_env_config(self.config_data.get("env_location"), game, parent_env).get("backend") == "overlay":
+            backend = "overlay"
+        elif not parent_env and get_overlay_method():
+            backend_name, ok = QInputDialog.getItem(self, "MultiJack", get_string("select_env_backend"), [get_string("env_backend_symlink"), get_string("env_backend_overlay")], 0, False)
+            if not ok:
+                return
+            if backend_name == get_string("env_backend_overlay"):
+                backend = "overlay"
+
+        env_id, specific_env_location = create_env_directory(self.config_data.get("env_location"), game, env_name, parent_env, backend)
+        if backend == "overlay":
+            finished = create_overlay_env_structure(specific_env_location)
+        elif parent_env:
+            finished = build_layered_env_structure(os.path.join(self.config_data.get("env_location"), game, parent_env), specific_env_location, game)
+        else:
+            finished = self.recreate_directory_structure(get_game_install_path(self.config_data, game), specific_env_location)
+        if not finished:
+            shutil.rmtree(specific_env_location, ignore_errors=True)
+            if parent_env:
+                QMessageBox.warning(self, "MultiJack", get_string("env_creation_failed"))
+        elif os.listdir(specific_env_location) != []:
+            write_env_config(specific_env_location, env_name, env_id, game, parent_env, backend, get_env_base_buildid(self.config_data, game, parent_env))
             success_msg = QMessageBox()
             success_msg.setIcon(QMessageBox.Icon.Information)
             success_msg.setWindowTitle("MultiJack")
@@ -936,121 +4252,12 @@ class MJMainWindow(QMainWindow):
             response = mod_msg.exec()
             if response == QMessageBox.StandardButton.Yes:
                 self.inject_mod_into_env(game, env_id)
-            self.manage_env(game)
-
-    # Please don't look into these functions unless you actively hate yourself.
-    def get_value(self, data, key):
-        keys = key.split('.')
-        for k in keys:
-            if isinstance(data, dict) and k in data:
-                data = data[k]
-            else:
-                return None
-        return data
-
-    def set_value(self, data, key, value):
-        keys = key.split('.')
-        d = data
-        for k in keys[:-1]:
-            if k not in d or not isinstance(d[k], dict):
-                d[k] = {}
-            d = d[k]
-        d[keys[-1]] = value
-
-    def read_vdf(self, file_path):
-        data = {}
-        with open(file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-        stack = [data]
-        last_key = None
-
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('//'):
-                continue
-
-            if line == '{':
-                new_dict = {}
-                if last_key is not None:
-                    stack[-1][last_key] = new_dict
-                stack.append(new_dict)
-            elif line == '}':
-                stack.pop()
-            else:
-                match = re.match(r'^"([^"]+)"\s+"(.*)"$', line)
-                if match:
-                    key, value = match.groups()
-                    stack[-1][key] = value
-                    last_key = key
-                else:
-                    last_key = line.strip('"')
-
-        return data
-
-    def save_vdf(self, data, file_path):
-        def write_dict(d, indent=0):
-            result = ""
-            for k, v in d.items():
-                if isinstance(v, dict):
-                    result += '\t' * (indent // 4) + f'"{k}"\n' + '\t' * (indent // 4) + '{\n' + write_dict(v, indent + 4) + '\t' * (indent // 4) + '}\n'
-                else:
-                    result += '\t' * (indent // 4) + f'"{k}"\t\t"{v}"\n'
-            return result
-
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.write(write_dict(data))
-
-    def add_launch_option(self):
-        steam_location = self.config_data.get("steam_location")
-        if not os.path.exists(steam_location):
-            QMessageBox.critical(None, "MultiJack", get_string("adding_launch_options_failed"))
-            return
+            self.refresh_env_model(game)
 
-        userdata_path = os.path.join(steam_location, "userdata")
-        if not os.path.exists(userdata_path):
+    def add_launch_option(self, modified_users):
+        if modified_users is None:
             QMessageBox.critical(None, "MultiJack", get_string("adding_launch_options_failed"))
             return
-        if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
-            executable = os.path.abspath(sys.executable)
-        else:
-            executable = f"python3 {os.path.abspath(__file__)}"
-            # ^^^ works only if python3 is added to path
-            # and if you have the dependencies
-            # either way, it's for debugging only
-
-        if os.name == "nt":
-            quoted_executable = f"\"{executable.replace("\\", "\\\\")}\"".replace("\"", "\\\"")
-        else:
-            quoted_executable = shlex.quote(executable)
-
-        launch_option = f"{quoted_executable} -launcher %command%"
-
-        modified_users = {}
-
-        for user_folder in os.listdir(userdata_path):
-            user_config_path = os.path.join(userdata_path, user_folder, "config", "localconfig.vdf")
-
-            if not os.path.exists(user_config_path):
-                continue
-
-            try:
-                data = self.read_vdf(user_config_path)
-                modified = False
-
-                for game, game_id in games.items():
-                    launch_options_key = f"UserLocalConfigStore.Software.Valve.Steam.apps.{game_id}.LaunchOptions"
-                    existing_value = self.get_value(data, launch_options_key)
-
-                    if existing_value is None or existing_value != launch_option:
-                        self.set_value(data, launch_options_key, launch_option)
-                        modified = True
-
-                if modified:
-                    modified_users[user_folder] = (user_config_path, data)
-
-            except Exception as e:
-                logger.error(f"Error reading VDF for user {user_folder}: {e}")
-
         if not modified_users:
             logger.info("All launch options are already correct. No updates needed.")
             return
@@ -1063,22 +4270,21 @@ class MJMainWindow(QMainWindow):
         response = msg_box.exec()
 
         if response == QMessageBox.StandardButton.No:
-            sys.exit(1)
+            self.close()
+            QApplication.exit(1)
+            return
 
-        while self.is_steam_running():
-            close_steam_msg = QMessageBox()
-            close_steam_msg.setIcon(QMessageBox.Icon.Warning)
-            close_steam_msg.setWindowTitle("MultiJack")
-            close_steam_msg.setText(get_string("steam_is_running"))
-            close_steam_msg.setStandardButtons(QMessageBox.StandardButton.Retry | QMessageBox.StandardButton.Cancel)
-            response = close_steam_msg.exec()
+        if not self.wait_for_steam_to_close():
+            self.close()
+            QApplication.exit(1)
+            return
 
-            if response == QMessageBox.StandardButton.Cancel:
-                sys.exit(1)
+        # Steam saves its own config when it closes, so read it again before writing over it
+        modified_users = find_launch_option_updates(self.config_data) or {}
 
         for user_folder, (user_config_path, data) in modified_users.items():
             try:
-                self.save_vdf(data, user_config_path)
+                save_vdf(data, user_config_path)
                 logger.info(f"Updated LaunchOptions for user {user_folder}.")
             except Exception as e:
                 logger.error(f"Error updating VDF for user {user_folder}: {e}")
@@ -1110,73 +4316,26 @@ class MJMainWindow(QMainWindow):
 
         QApplication.processEvents()
 
-        total_files = sum(len(files) for _, _, files in os.walk(src_dir))
-        processed_files = 0
-        operation_canceled = False
-
-        for root, dirs, files in os.walk(src_dir):
-            rel_path = os.path.relpath(root, src_dir)
-            new_dest_dir = os.path.join(dest_dir, rel_path)
-            os.makedirs(new_dest_dir, exist_ok=True)
-
-        game = os.path.basename(os.path.normpath(src_dir))
-        macos_path = os.path.join(src_dir, f"{game}.app", "Contents", "MacOS", game)
-
-        for root, dirs, files in os.walk(src_dir):
-            rel_path = os.path.relpath(root, src_dir)
-            new_dest_dir = os.path.join(dest_dir, rel_path)
-
-            for file in files:
-                src_file = os.path.abspath(os.path.join(root, file))
-                dest_file = os.path.join(new_dest_dir, file)
-
-                if file.endswith("-log.txt"):
-                    continue
-
-                try:
-                    if sys.platform == "darwin" and os.path.abspath(src_file) == macos_path:
-                        if not os.path.exists(dest_file):
-                            shutil.copy2(src_file, dest_file)
-                            logger.info(f"Copied file: {src_file} -> {dest_file}")
-                        else:
-                            logger.warning(f"File already exists: {dest_file}")
-                    elif sys.platform == "linux" and root == src_dir and (
-                            file.endswith("_Vulkan") or file.endswith("_OpenGL")):
-                        if not os.path.exists(dest_file):
-                            shutil.copy2(src_file, dest_file)
-                            logger.info(f"Copied file: {src_file} -> {dest_file}")
-                        else:
-                            logger.warning(f"File already exists: {dest_file}")
-                    else:
-                        if not os.path.exists(dest_file):
-                            os.symlink(src_file, dest_file)
-                            if os.path.islink(dest_file) and os.path.exists(os.readlink(dest_file)):
-                                logger.info(f"Symlink created: {dest_file} -> {src_file}")
-                            else:
-                                logger.error(f"Failed to verify symlink: {dest_file}")
-                        else:
-                            logger.warning(f"Symlink already exists: {dest_file}")
-                except OSError as e:
-                    logger.error(f"Error processing file {src_file} -> {dest_file}: {e}")
-
-                processed_files += 1
-                progress = int((processed_files / total_files) * 100)
-                progress_dialog.setValue(progress)
-                progress_dialog.setLabelText(f"{get_string("processing")}: {os.path.basename(src_file)}")
+        last_update = 0.0
 
-                QApplication.processEvents()
+        def on_progress(processed_files, total_files, file_name):
+            nonlocal last_update
+            # Repainting for every single file costs more than the file itself
+            if time.monotonic() - last_update < 0.05 and processed_files < total_files:
+                return
+            last_update = time.monotonic()
+            progress_dialog.setValue(int((processed_files / total_files) * 100))
+            progress_dialog.setLabelText(f"{get_string("processing")}: {file_name}")
+            QApplication.processEvents()
 
-                if progress_dialog.wasCanceled():
-                    operation_canceled = True
-                    logger.info("Operation canceled by user.")
-                    progress_dialog.close()
-                    return
+        finished = build_env_structure(src_dir, dest_dir, on_progress, progress_dialog.wasCanceled)
 
         progress_dialog.setValue(100)
         progress_dialog.close()
 
-        if operation_canceled:
+        if not finished:
             QMessageBox.warning(self, "MultiJack", get_string("env_creation_failed"))
+        return finished
 
     def inject_mod_into_env(self, game, env_id):
         folder_path = QFileDialog.getExistingDirectory(self, get_string("select_install_location"))
@@ -1194,14 +4353,122 @@ class MJMainWindow(QMainWindow):
         if self.check_folder_for_malicious_stuff(folder_path, game):
             return
 
-        env_path = os.path.join(self.config_data.get("env_location"), game, env_id)
+        result = self.copy_mod_into_env(game, env_id, folder_path)
+        if result == "mod_injection_success":
+            QMessageBox.information(self, "MultiJack", get_string(result))
+        elif result == "env_not_found_error":
+            QMessageBox.warning(self, "MultiJack", get_string(result))
+        elif result is not None:
+            QMessageBox.critical(self, "MultiJack", get_string(result))
+
+    def import_mod_to_catalog(self, game):
+        source_type, ok = QInputDialog.getItem(self, "MultiJack", get_string("import_mod_from"), [get_string("mod_source_folder"), get_string("mod_source_archive")], 0, False)
+        if not ok:
+            return
+        if source_type == get_string("mod_source_folder"):
+            source_path = QFileDialog.getExistingDirectory(self, get_string("select_install_location"))
+        else:
+            source_path, _ = QFileDialog.getOpenFileName(self, get_string("select_mod_archive"), "", "Archives (*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz)")
+        if not source_path:
+            return
+
+        mod_name, ok = QInputDialog.getText(self, "MultiJack", get_string("name_mod"), text=os.path.basename(source_path.rstrip("/\\")))
+        if not ok or not mod_name.strip():
+            return
+
+        progress_dialog = QProgressDialog(get_string("importing_mod"), "Cancel", 0, 0, self)
+        progress_dialog.setCancelButton(None)
+        progress_dialog.setWindowTitle("MultiJack")
+        progress_dialog.setMinimumWidth(400)
+        progress_dialog.setWindowModality(Qt.WindowModality.ApplicationModal)
+        progress_dialog.show()
+
+        import_errors = []
+        import_task = BackgroundTask(import_mod_to_catalog, source_path, mod_name, game, get_game_install_path(self.config_data, game))
+        import_task.task_failed.connect(import_errors.append)
+        import_results = []
+        import_task.result_ready.connect(import_results.append)
+        import_task.start()
+        while not import_task.wait(50):
+            QApplication.processEvents()
+        QApplication.processEvents()
+        progress_dialog.close()
+
+        if not import_results:
+            logger.error(f"Failed to import {source_path}: {import_errors}")
+            QMessageBox.warning(self, "MultiJack", get_string("not_a_jackbox_mod_error_macos" if sys.platform == "darwin" else "not_a_jackbox_mod_error"))
+            return
+
+        # The safety question is asked once here instead of on every injection
+        mod_id, mod_info = import_results[0]
+        if not self.confirm_overridden_executables(mod_info["overridden_executables"]):
+            remove_mod_from_catalog(mod_id)
+            return
+        QMessageBox.information(self, "MultiJack", get_string("mod_imported"))
+
+    def inject_catalog_mod(self, game, selected_env=None):
+        catalog = load_mod_catalog()
+        game_mods = {}
+        for mod_id, mod_info in sorted(catalog.items(), key=lambda item: item[1].get("name", "").lower()):
+            if mod_info.get("game") == game:
+                game_mods[f"{mod_info.get("name")} ({format_size(mod_info.get("size", 0))})"] = mod_id
+        if not game_mods:
+            QMessageBox.warning(self, "MultiJack", get_string("catalog_empty"))
+            return
+        mod_label, ok = QInputDialog.getItem(self, "MultiJack", get_string("select_catalog_mod"), list(game_mods), 0, False)
+        if not ok:
+            return
+        mod_id = game_mods[mod_label]
+        mod_info = catalog[mod_id]
+
+        env_dialog = QDialog(self)
+        env_dialog.setWindowTitle("MultiJack")
+        env_dialog.setGeometry(100, 100, 400, 300)
+        env_dialog_layout = QVBoxLayout(env_dialog)
+        env_dialog_layout.addWidget(QLabel(get_string("select_envs_to_inject"), env_dialog))
+        env_checklist = QListWidget(env_dialog)
+        for env_id, env_name in get_env_entries(self.config_data.get("env_location"), game):
+            item = QListWidgetItem(env_name, env_checklist)
+            item.setData(Qt.ItemDataRole.UserRole, env_id)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if env_id == selected_env else Qt.CheckState.Unchecked)
+        env_dialog_layout.addWidget(env_checklist)
+        inject_button = QPushButton(get_string("inject_mod_into_env"), env_dialog)
+        inject_button.clicked.connect(env_dialog.accept)
+        env_dialog_layout.addWidget(inject_button)
+        if env_dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        selected_envs = [env_checklist.item(row) for row in range(env_checklist.count()) if env_checklist.item(row).checkState() == Qt.CheckState.Checked]
+        if not selected_envs:
+            QMessageBox.warning(self, "MultiJack", get_string("select_env_error"))
+            return
+
+        report = []
+        for item in selected_envs:
+            result = self.copy_mod_into_env(game, item.data(Qt.ItemDataRole.UserRole), get_catalog_mod_root(mod_id, mod_info), mod_info["files"])
+            if result is None:
+                break
+            report.append(f"{item.text()}: {get_string(result)}")
+        logger.info(f"Injected catalog mod {mod_info.get("name")}:\n" + "\n".join(report))
+        if report:
+            QMessageBox.information(self, "MultiJack", "\n".join(report))
+
+    @profiled("copy_mod_into_env")
+    def copy_mod_into_env(self, game, env_id, folder_path, mod_files=None):
+        # Returns the string describing how it went, or None if the user canceled it.
+        # mod_files comes from the catalog, and saves walking the mod again
+        env_path = get_env_content_dir(self.config_data.get("env_location"), game, env_id)
 
         if sys.platform == "darwin":
             env_path = os.path.join(env_path, f"{game}.app", "Contents", "Resources", "macos")
 
         if not os.path.exists(env_path):
-            QMessageBox.warning(self, "MultiJack", get_string("env_not_found_error"))
-            return
+            return "env_not_found_error"
+        if is_env_hibernated(read_env_config(self.config_data.get("env_location"), game, env_id)):
+            if not run_with_progress(self, get_string("restoring_env"), restore_env, self.config_data, game, env_id):
+                return "env_restore_failed"
+            self.refresh_env_model(game)
 
         operation_canceled = False
         progress_dialog = QProgressDialog(
@@ -1212,28 +4479,56 @@ class MJMainWindow(QMainWindow):
         progress_dialog.setValue(0)
         progress_dialog.show()
 
-        total_files = sum(len(files) for _, _, files in os.walk(folder_path))
+        stat_cache = StatCache()
+        if mod_files is None:
+            mod_files = {}
+            for _, _, files in walk_tree(folder_path, stat_cache):
+                for mod_entry in files:
+                    mod_files[os.path.relpath(mod_entry.path, folder_path)] = {"size": stat_cache.stat(mod_entry.path).st_size}
+        mod_dirs = {}
+        for relative_file, file_info in mod_files.items():
+            mod_dirs.setdefault(os.path.dirname(relative_file), []).append((os.path.basename(relative_file), file_info))
+        total_files = len(mod_files)
         processed_files = 0
+        operation_log = FileOperationLog(f"Injecting {folder_path} into {env_path}")
 
-        for root, _, files in os.walk(folder_path):
-            rel_path = os.path.relpath(root, folder_path)
-            dest_dir = os.path.join(env_path, rel_path)
-            os.makedirs(dest_dir, exist_ok=True)
-
-            for file in files:
-                mod_file = os.path.join(root, file)
+        env_root = get_env_content_dir(self.config_data.get("env_location"), game, env_id)
+        invalidate_env_usage(env_root)
+        for rel_path, files in mod_dirs.items():
+            dest_dir = os.path.normpath(os.path.join(env_path, rel_path))
+            # Directories linked to a parent env have to become real before we write into them
+            try:
+                ensure_real_directory(env_root, os.path.relpath(dest_dir, env_root))
+            except OSError as e:
+                operation_log.record("errors", logging.ERROR, "Failed to make %s writable: %s", dest_dir, e)
+                operation_log.summary()
+                progress_dialog.close()
+                return "mod_path_conflict"
+            stat_cache.forget(dest_dir)
+            dest_entries = stat_cache.list_dir(dest_dir)
+
+            for file, file_info in files:
+                mod_file = os.path.join(folder_path, rel_path, file)
                 dest_file = os.path.join(dest_dir, file)
+                dest_entry = dest_entries.get(file)
 
-                if os.path.islink(dest_file):
-                    logger.info(f"Removing existing symlink: {dest_file}")
+                if dest_entry is not None and dest_entry.is_symlink():
+                    operation_log.record("replaced links", logging.DEBUG, "Removing existing symlink: %s", dest_file)
                     os.unlink(dest_file)
+                    stat_cache.forget(dest_file)
+                    dest_entry = None
 
-                if os.path.exists(dest_file):
+                if dest_entry is not None:
                     try:
-                        if not os.path.samefile(mod_file, dest_file):
-                            with open(mod_file, 'rb') as f1, open(dest_file, 'rb') as f2:
-                                if f1.read() == f2.read():
-                                    logger.info(f"Files are identical, skipping: {dest_file}")
+                        if not stat_cache.samefile(mod_file, dest_file):
+                            if file_info["size"] == stat_cache.stat(dest_file).st_size:
+                                if "sha256" in file_info:
+                                    identical = hash_file(dest_file) == file_info["sha256"]
+                                else:
+                                    with open(mod_file, 'rb') as f1, open(dest_file, 'rb') as f2:
+                                        identical = f1.read() == f2.read()
+                                if identical:
+                                    operation_log.record("identical", logging.DEBUG, "Files are identical, skipping: %s", dest_file)
                                     continue
 
                             relative_dest_file = os.path.relpath(dest_file, env_path)
@@ -1245,98 +4540,70 @@ class MJMainWindow(QMainWindow):
                                 break
 
                             shutil.copy2(mod_file, dest_file)
-                            logger.info(f"Overwritten: {relative_dest_file}")
+                            stat_cache.forget(dest_file)
+                            operation_log.record("overwritten", logging.DEBUG, "Overwritten: %s", relative_dest_file)
                     except Exception as e:
-                        logger.error(f"Error checking or overwriting file {mod_file} -> {dest_file}: {e}")
+                        operation_log.record("errors", logging.ERROR, "Error checking or overwriting file %s -> %s: %s", mod_file, dest_file, e)
                 else:
                     try:
                         shutil.copy2(mod_file, dest_file)
-                        logger.info(f"Copied: {dest_file}")
+                        operation_log.record("copied", logging.DEBUG, "Copied: %s", dest_file)
                     except Exception as e:
-                        logger.error(f"Error copying file {mod_file} -> {dest_file}: {e}")
+                        operation_log.record("errors", logging.ERROR, "Error copying file %s -> %s: %s", mod_file, dest_file, e)
 
                 processed_files += 1
                 progress = int((processed_files / total_files) * 100)
                 progress_dialog.setValue(progress)
-                progress_dialog.setLabelText(f"Processing: {os.path.basename(mod_file)}")
+                progress_dialog.setLabelText(f"Processing: {file}")
 
                 QApplication.processEvents()
 
                 if progress_dialog.wasCanceled():
-                    operation_canceled = True
                     logger.info("Operation canceled by user.")
+                    operation_log.summary()
                     progress_dialog.close()
-                    return
+                    return None
+
+            if operation_canceled:
+                break
 
+        operation_log.summary()
+        propagate_env_to_children(self.config_data.get("env_location"), game, env_id)
         progress_dialog.setValue(100)
         progress_dialog.close()
 
-        if operation_canceled:
-            QMessageBox.critical(self, "MultiJack", get_string("mod_injection_failed"))
-        else:
-            QMessageBox.information(self, "MultiJack", get_string("mod_injection_success"))
+        return "mod_injection_failed" if operation_canceled else "mod_injection_success"
 
     def check_folder_for_malicious_stuff(self, folder_path, game):
-        vanilla_game_path = os.path.join(self.config_data.get("install_location", ""), game)
+        vanilla_game_path = get_game_install_path(self.config_data, game)
 
         if not os.path.exists(vanilla_game_path):
             logger.error(f"Vanilla game path not found: {vanilla_game_path}")
             return False
 
-        executable_extensions = {".exe", ".dll", ".sh", ".dylib", "_Vulkan", "_OpenGL"}
-        malicious_so_regex = re.compile(r"\.so(\.\d+)?$")
-
-        vanilla_executables = set()
-        for root, _, files in os.walk(vanilla_game_path):
-            for file in files:
-                if any(file.endswith(ext) for ext in executable_extensions) or malicious_so_regex.search(file):
-                    relative_path = os.path.relpath(os.path.join(root, file), vanilla_game_path)
-                    vanilla_executables.add(relative_path)
-
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                if any(file.endswith(ext) for ext in executable_extensions) or malicious_so_regex.search(file):
-                    relative_path = os.path.relpath(os.path.join(root, file), folder_path)
-
-                    if relative_path in vanilla_executables:
-                        response = QMessageBox.question(
-                            self,
-                            "MultiJack",
-                            f"{get_string("mod_replaces_weird_files")}\n\n'{relative_path}'\n\n{get_string("do_you_want_to_continue")}",
-                            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                        )
-
-                        if response == QMessageBox.StandardButton.No:
-                            return True
-        return False
-
-    def validate_folder(self, folder_path):
-        for root, dirs, files in os.walk(folder_path):
-            for dir_name in dirs:
-                if any(dir_name.endswith(prefix) for prefix in ["games", "content", "videos"]):
-                    return True
-            for file_name in files:
-                if any(file_name.endswith(prefix) for prefix in [".swf", ".jet", ".json", ".usm", ".swf"]):
-                    return True
-        return False
+        return not self.confirm_overridden_executables(sorted(find_executables(folder_path) & find_executables(vanilla_game_path)))
 
-    def get_relative_env_path(self, game, env_id):
-        install_location = os.path.abspath(self.config_data.get("install_location", "").rstrip("/"))
-        env_location = os.path.abspath(os.path.join(self.config_data.get("env_location", ""), game, env_id))
+    def confirm_overridden_executables(self, overridden_executables):
+        for relative_path in overridden_executables:
+            response = QMessageBox.question(
+                self,
+                "MultiJack",
+                f"{get_string("mod_replaces_weird_files")}\n\n'{relative_path}'\n\n{get_string("do_you_want_to_continue")}",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
 
-        if not install_location or not env_location:
-            raise ValueError("Install location or environment location is not set.")
+            if response == QMessageBox.StandardButton.No:
+                return False
+        return True
 
-        relative_path = os.path.relpath(env_location, install_location)
-        relative_path = "../" + relative_path
-        return relative_path
+    def validate_folder(self, folder_path):
+        return bool(find_mod_markers(folder_path, first_only=True))
 
 app = QApplication(sys.argv)
 logger = logging.getLogger(__name__)
 
-# log get big. space wasted.
-if os.path.exists(os.path.join(get_default_config_location(), "multijack.log")):
-    os.remove(os.path.join(get_default_config_location(), "multijack.log"))
+if profiling_enabled:
+    QTimer.singleShot(0, finish_startup_profile)
 
 def get_arg_value(flag):
     if flag in sys.argv:
@@ -1348,11 +4615,11 @@ def get_arg_value(flag):
 if "-launch" in sys.argv:
     with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
         config_data = json.load(config_file)
-    logging.basicConfig(filename=os.path.join(get_default_config_location(), "multijacklaunch.log"), encoding='utf-8', level=logging.DEBUG)
+    setup_logging("launch", config_data.get("log_level"))
     game = get_arg_value("-launch")
     env = get_arg_value("-env")
     launch_options = get_arg_value("-launch_options")
-    if os.path.exists(os.path.join(config_data.get("install_location"), game)):
+    if os.path.exists(get_game_install_path(config_data, game)):
         if env:
             if not os.path.exists(os.path.join(config_data.get("env_location"), game, env)):
                 logger.error(f"Environment {env} does not exist!")
@@ -1366,19 +4633,110 @@ if "-launch" in sys.argv:
                 os.system(f"xdg-open steam://launch/{games.get(game)}")
     sys.exit(0)
 
+elif "-diff" in sys.argv:
+    with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
+        config_data = json.load(config_file)
+    setup_logging("cli", config_data.get("log_level"))
+    game = get_arg_value("-diff")
+    if game not in games:
+        print(f"Unknown game: {game}", file=sys.stderr)
+        sys.exit(1)
+    # Envs can be given by their ID or their name, no -against means the vanilla game
+    env_ids = {}
+    for env_id, env_name in get_env_entries(config_data.get("env_location"), game):
+        env_ids[env_id] = env_id
+        env_ids.setdefault(env_name, env_id)
+    env = get_arg_value("-env")
+    against = get_arg_value("-against")
+    if env not in env_ids or (against is not None and against not in env_ids):
+        print("Usage: -diff <game> -env <env> [-against <env>] [-restore]", file=sys.stderr)
+        sys.exit(1)
+    # Hibernated envs are only unpacked when asked to
+    for env_id in get_hibernated_envs(config_data, game, [env_ids.get(against), env_ids[env]]):
+        if "-restore" not in sys.argv:
+            print(f"{env_id} is hibernated, pass -restore to restore it for the comparison", file=sys.stderr)
+            sys.exit(1)
+        if not restore_env(config_data, game, env_id):
+            print(f"Failed to restore {env_id}", file=sys.stderr)
+            sys.exit(1)
+    for line in format_env_diff(*diff_envs(config_data, game, env_ids.get(against), env_ids[env])):
+        print(line)
+    shutdown_logging()
+    sys.exit(0)
+
+elif "-sync" in sys.argv:
+    with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
+        config_data = json.load(config_file)
+    setup_logging("cli", config_data.get("log_level"))
+    source_location = get_arg_value("-sync")
+    if not source_location or not os.path.isdir(source_location):
+        print("Usage: -sync <env location to sync from>", file=sys.stderr)
+        sys.exit(1)
+    synced_envs, counts = sync_env_locations(config_data, source_location)
+    print(f"Synced {synced_envs} envs (" + ", ".join(f"{outcome}: {count}" for outcome, count in sorted(counts.items())) + ")")
+    shutdown_logging()
+    sys.exit(1 if "errors" in counts else 0)
+
+elif "-retarget" in sys.argv:
+    with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
+        config_data = json.load(config_file)
+    setup_logging("cli", config_data.get("log_level"))
+    # Without -to the links are pointed at the install location MultiJack is set to now
+    old_location = get_arg_value("-retarget")
+    new_location = get_arg_value("-to") or config_data.get("install_location")
+    if not old_location or not new_location:
+        print("Usage: -retarget <old location> [-to <new location>]", file=sys.stderr)
+        sys.exit(1)
+    print(f"Retargeted {retarget_env_links(config_data.get("env_location"), old_location, new_location)} links")
+    shutdown_logging()
+    sys.exit(0)
+
+elif "-launch_metrics" in sys.argv:
+    with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
+        config_data = json.load(config_file)
+    _selected_language = config_data.get("language")
+    for line in summarize_launch_metrics(load_launch_metrics(), config_data.get("env_location")):
+        print(line)
+    sys.exit(0)
+
 elif "-launcher" in sys.argv:
+    launch_timer = LaunchTimer(get_process_start_time())
     if not os.path.exists(os.path.join(get_default_config_location(), "config.json")):
         QMessageBox.critical(None, "MultiJack", "Your config file was not found! Please open MultiJack!")
         sys.exit(1)
     with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
         config_data = json.load(config_file)
-    logging.basicConfig(filename=os.path.join(get_default_config_location(), "multijacklauncher.log"), encoding='utf-8', level=logging.DEBUG)
+    launch_timer.mark("config_loaded")
+    setup_logging("launcher", config_data.get("log_level"))
     _selected_language = config_data.get("language")
+    temp_launch = None
     if config_data.get("temp_launch"):
-        _temp_launch = config_data.get("temp_launch")
+        temp_launch = config_data.get("temp_launch")
         set_config_option({"temp_launch": []})
-    window = LaunchEnvWindow()
-    window.show()
+    window = LaunchEnvWindow(sys.argv[-1], temp_launch, launch_timer=launch_timer)
+    if not window.start():
+        sys.exit(1)
+    exit_code = app.exec()
+    # These are daemon threads so quitting the GUI or the resident launcher never hangs on them,
+    # they all give up on their own after a while
+    for thread in threading.enumerate():
+        if isinstance(thread, (AssetPrefetcher, LaunchLatencyTracker)):
+            thread.join()
+    sys.exit(exit_code)
+
+elif "-resident" in sys.argv:
+    if not os.path.exists(os.path.join(get_default_config_location(), "config.json")):
+        QMessageBox.critical(None, "MultiJack", "Your config file was not found! Please open MultiJack!")
+        sys.exit(1)
+    with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
+        config_data = json.load(config_file)
+    setup_logging("resident", config_data.get("log_level"))
+    _selected_language = config_data.get("language")
+    if send_to_resident_launcher([]):
+        logger.info("The resident launcher is already running.")
+        sys.exit(0)
+    app.setQuitOnLastWindowClosed(False)
+    resident_launcher = ResidentLauncher(config_data)
     sys.exit(app.exec())
 else:
     try:
@@ -1391,7 +4749,7 @@ else:
         with open(os.path.join(get_default_config_location(), "config.json"), 'r', encoding='utf-8') as config_file:
             config_data = json.load(config_file)
         _selected_language = config_data.get("language")
-        logging.basicConfig(filename=os.path.join(get_default_config_location(), "multijack.log"), encoding='utf-8', level=logging.DEBUG)
+        setup_logging("gui", config_data.get("log_level"))
         if config_data.get("language") == "":
             open_language_selection_window = mj_language_selection_window()
             open_language_selection_window.show()
@@ -1405,7 +4763,7 @@ else:
             open_env_location_config_window = mj_env_location_config_window()
             open_env_location_config_window.show()
         else:
-            open_main_window = MJMainWindow()
+            open_main_window = MJMainWindow(config_data)
             open_main_window.show()
     except FileNotFoundError:
         open_language_selection_window = mj_language_selection_window()